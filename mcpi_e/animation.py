@@ -0,0 +1,116 @@
+import time
+import numpy as np
+from . import voxel
+
+""" Frame based animation
+
+    An Animation keeps the frame that is in the world and sends only the
+    cells that change to the next frame, merged into setBlocks boxes. A
+    moving platform or a clock hand then costs a few commands per frame
+    instead of a full redraw.
+
+    Frames are [x, y, z] id arrays of one shape, or (ids, data) pairs,
+    placed with their [0, 0, 0] cell at origin. Cells set to skip (-1) are
+    left alone. play() sends frames at fps; when the connection falls
+    behind, frames whose time has already passed are dropped, and the next
+    frame is sent as the difference to the last one that was shown, so the
+    world never ends up wrong.
+
+    Example:
+        def frames():
+            for step in range(20):
+                ids = np.zeros((20, 1, 5), dtype=int)
+                ids[step, 0, :] = block.GOLD_BLOCK.id
+                yield ids
+
+        Animation(mc, (x, y, z), fps=20).play(frames())
+"""
+
+class Animation:
+    """Sends each frame as the difference to the one before"""
+    clock = staticmethod(time.time)
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, mc, origin, fps=10.0, skip=-1):
+        self.mc = mc
+        self.origin = tuple(int(v) for v in origin)
+        self.fps = fps
+        self.skip = skip
+        self.ids = None
+        self.data = None
+        self.shown = 0
+        self.dropped = 0
+        self.commands = 0
+
+    def reset(self, ids=None, data=None):
+        """Set what is in the world now, None when it is unknown and the next frame is sent in full"""
+        if ids is None:
+            self.ids = self.data = None
+        else:
+            self.ids = np.array(ids, dtype=np.int32)
+            self.data = np.zeros_like(self.ids) if data is None else np.array(data, dtype=np.int32)
+
+    def delta(self, ids, data=None):
+        """Boxes that turn the shown frame into this one => array of (x0,y0,z0,x1,y1,z1,id,data)"""
+        ids, data = _split(ids, data)
+        if self.ids is not None and self.ids.shape != ids.shape:
+            raise ValueError("frame shape {} differs from {}".format(ids.shape, self.ids.shape))
+        changed = ids != self.skip
+        if self.ids is not None:
+            changed &= (ids != self.ids) | (data != self.data)
+        return voxel.boxes(np.where(changed, ids, self.skip), data, skip=self.skip,
+                           span=voxel.spanFor(self.mc.settings))
+
+    def show(self, ids, data=None):
+        """Send one frame now => number of commands"""
+        ids, data = _split(ids, data)
+        rows = self.delta(ids, data)
+        count = voxel.writeBoxes(self.mc, rows, self.origin)
+        self.mc.conn.flush()
+        # the world keeps what was there for skipped cells
+        if self.ids is None:
+            self.ids = np.full(ids.shape, self.skip, dtype=np.int32)
+            self.data = np.zeros(ids.shape, dtype=np.int32)
+        keep = ids == self.skip
+        self.ids = np.where(keep, self.ids, ids)
+        self.data = np.where(keep, self.data, data)
+        self.shown += 1
+        self.commands += count
+        return count
+
+    def play(self, frames, loops=1):
+        """Show a sequence (or generator) of frames at fps, dropping late frames => self
+
+        A frame is dropped when the time of the frame after it has already
+        come. The last frame is always shown."""
+        if loops != 1:
+            frames = list(frames)
+            frames = [f for _ in range(loops) for f in frames]
+        period = 1.0 / self.fps
+        frames = iter(frames)
+        current = next(frames, None)
+        start = self.clock()
+        k = 0
+        while current is not None:
+            following = next(frames, None)
+            late = self.clock() - (start + (k + 1) * period)
+            if following is not None and late >= 0:
+                self.dropped += 1
+            else:
+                self.show(current)
+                wait = start + (k + 1) * period - self.clock()
+                if wait > 0:
+                    self.sleep(wait)
+            current = following
+            k += 1
+        return self
+
+def _split(ids, data):
+    """A frame as (ids, data) int32 arrays"""
+    if data is None and isinstance(ids, tuple):
+        ids, data = ids
+    ids = np.asarray(ids, dtype=np.int32)
+    if ids.ndim != 3:
+        raise ValueError("expected a 3d array indexed [x, y, z]")
+    data = np.zeros_like(ids) if data is None else np.broadcast_to(np.asarray(data, dtype=np.int32), ids.shape)
+    return ids, data
@@ -1,8 +1,13 @@
-class Block:
-    """Minecraft PI block description. Can be sent to Minecraft.setBlock/s"""
-    def __init__(self, id, data=0):
-        self.id = id
-        self.data = data
+from collections import namedtuple
+
+class Block(namedtuple("Block", "id data")):
+    """Minecraft PI block description. Can be sent to Minecraft.setBlock/s
+
+    Blocks are immutable, lookup(id, data) returns a shared instance."""
+    __slots__ = ()
+
+    def __new__(cls, id, data=0):
+        return super(Block, cls).__new__(cls, id, data)
 
     def __cmp__(self, rhs):
         return hash(self) - hash(rhs)
@@ -10,11 +15,14 @@ class Block:
     def __eq__(self, rhs):
         return self.id == rhs.id and self.data == rhs.data
 
+    def __ne__(self, rhs):
+        return not self.__eq__(rhs)
+
     def __hash__(self):
         return (self.id << 8) + self.data
 
     def withData(self, data):
-        return Block(self.id, data)
+        return lookup(self.id, data)
 
     def __iter__(self):
         """Allows a Block to be sent whenever id [and data] is needed"""
@@ -100,7 +108,7 @@ SOUL_SAND           = Block(88)
 GLOWSTONE_BLOCK     = Block(89)
 LIT_PUMPKIN         = Block(91)
 STAINED_GLASS       = Block(95)
-BEDROCK_INVISIBLE   = Block(95)
+BEDROCK_INVISIBLE   = STAINED_GLASS
 TRAPDOOR            = Block(96)
 STONE_BRICK         = Block(98)
 GLASS_PANE          = Block(102)
@@ -131,3 +139,63 @@ DOOR_ACACIA         = Block(196)
 DOOR_DARK_OAK       = Block(197)
 GLOWING_OBSIDIAN    = Block(246)
 NETHER_REACTOR_CORE = Block(247)
+
+
+""" Registry
+
+    Every (id, data) with id < 256 and data < 16 has one interned Block in a
+    dense table, so reading blocks does not create new objects. The names
+    are the constants above, an alias (WATER, BEDROCK_INVISIBLE) resolves to
+    the block of the first name defined for it.
+"""
+
+MAX_ID = 256
+MAX_DATA = 16
+
+_BY_NAME = {}
+_NAME_OF = {}
+for _name, _value in list(globals().items()):
+    if isinstance(_value, Block) and _name.isupper():
+        _BY_NAME[_name] = _value
+        _NAME_OF.setdefault(_value, _name)
+
+_TABLE = [None] * (MAX_ID * MAX_DATA)
+for _block in _NAME_OF:
+    if 0 <= _block.id < MAX_ID and 0 <= _block.data < MAX_DATA:
+        _TABLE[_block.id * MAX_DATA + _block.data] = _block
+for _i in range(len(_TABLE)):
+    if _TABLE[_i] is None:
+        _TABLE[_i] = Block(_i // MAX_DATA, _i % MAX_DATA)
+del _name, _value, _block, _i
+_EXTRA = {}
+
+def lookup(id, data=0):
+    """The interned Block for (id, data)"""
+    if 0 <= id < MAX_ID and 0 <= data < MAX_DATA:
+        return _TABLE[id * MAX_DATA + data]
+    key = (id, data)
+    b = _EXTRA.get(key)
+    if b is None:
+        b = _EXTRA[key] = tuple.__new__(Block, key)
+    return b
+
+def byName(name):
+    """The Block of a constant name, e.g. byName("STONE") => Block(1, 0)"""
+    try:
+        return _BY_NAME[name.upper()]
+    except KeyError:
+        raise ValueError("unknown block name {}".format(name))
+
+def nameOf(b, data=None):
+    """Constant name of a Block or id => str, None for unnamed blocks
+
+    A block with data falls back to the name of its id, so
+    nameOf(WOOL.withData(3)) is WOOL"""
+    if not isinstance(b, Block):
+        b = lookup(b, 0 if data is None else data)
+    elif data is not None:
+        b = lookup(b.id, data)
+    name = _NAME_OF.get(b)
+    if name is None and b.data != 0:
+        name = _NAME_OF.get(lookup(b.id, 0))
+    return name
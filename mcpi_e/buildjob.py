@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import socket
+import time
+from .minecraft import Minecraft, intFloor
+from .util import flatten_parameters_to_bytestring
+from .logger import *
+
+""" Resumable bulk builds
+
+    A BuildJob collects world commands, splits them into numbered segments
+    and records the last segment the server has confirmed in a small journal
+    file. If the connection drops, the job reconnects with Minecraft.create
+    and carries on from the last confirmed segment instead of starting over.
+
+    Example:
+        job = BuildJob("castle.journal", segmentSize=200)
+        for x in range(100):
+            job.setBlock(x, 10, 0, block.STONE.id)
+        job.run(address, port, name)
+
+    The job has to be built in the same order every time the script runs,
+    the journal stores a fingerprint of the commands and starts from scratch
+    when they do not match.
+"""
+
+class BuildJob:
+    """A long running build that survives disconnects"""
+    def __init__(self, journal, segmentSize=100, probeEvery=1, retries=10, retryDelay=2.0):
+        self.journal = journal
+        self.segmentSize = segmentSize
+        self.probeEvery = probeEvery
+        self.retries = retries
+        self.retryDelay = retryDelay
+        self.commands = []
+        self.confirmed = 0
+        self._fingerprint = None
+
+    def add(self, f, *args):
+        """Queue a raw command (b"world.setBlock", x,y,z,id)"""
+        self.commands.append((f, intFloor(args)))
+        self._fingerprint = None
+
+    def setBlock(self, *args):
+        """Queue a block (x,y,z,id,[data])"""
+        self.add(b"world.setBlock", args)
+
+    def setBlocks(self, *args):
+        """Queue a cuboid of blocks (x0,y0,z0,x1,y1,z1,id,[data])"""
+        self.add(b"world.setBlocks", args)
+
+    def segmentCount(self):
+        """Number of segments the queued commands are split into"""
+        return (len(self.commands) + self.segmentSize - 1) // self.segmentSize
+
+    def segment(self, n):
+        """The commands of segment n"""
+        return self.commands[n * self.segmentSize:(n + 1) * self.segmentSize]
+
+    def fingerprint(self):
+        """Hash of the queued commands, used to detect a changed job
+
+        Computed once and kept until another command is queued, save() runs
+        after every confirmed segment."""
+        if self._fingerprint is not None:
+            return self._fingerprint
+        h = hashlib.sha1()
+        h.update(str(self.segmentSize).encode("UTF-8"))
+        for f, args in self.commands:
+            h.update(f)
+            h.update(b"(")
+            h.update(flatten_parameters_to_bytestring(args))
+            h.update(b")\n")
+        self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def done(self):
+        """True when every segment is confirmed"""
+        return self.confirmed >= self.segmentCount()
+
+    def load(self):
+        """Read the journal => number of confirmed segments"""
+        self.confirmed = 0
+        if os.path.exists(self.journal):
+            with open(self.journal, "r") as f:
+                state = json.load(f)
+            if state.get("fingerprint") == self.fingerprint():
+                self.confirmed = int(state.get("confirmed", 0))
+            else:
+                warn("journal {} belongs to a different job, starting over".format(self.journal))
+        return self.confirmed
+
+    def save(self):
+        """Write the journal, replacing the old one in a single step"""
+        state = {"fingerprint": self.fingerprint(),
+                 "confirmed": self.confirmed,
+                 "segments": self.segmentCount()}
+        tmp = self.journal + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal)
+
+    def reset(self):
+        """Forget the progress and remove the journal"""
+        self.confirmed = 0
+        if os.path.exists(self.journal):
+            os.remove(self.journal)
+
+    def probe(self, conn):
+        """Round trip to the server, the reply means every command sent before it was applied"""
+        conn.flush()
+        conn.sendReceive(b"world.getHeight", 0, 0)
+
+    def run(self, address="localhost", port=4711, playerName="", settings=None, transport=None):
+        """Send the remaining segments, reconnecting after a dropped connection
+
+        transport is passed on to Minecraft.create; give a function that
+        returns a new transport (e.g. world.transport, a method of an existing
+        MemoryWorld) to reconnect with a fresh one after a drop."""
+        self.load()
+        total = self.segmentCount()
+        if self.confirmed > 0:
+            log("resume build from segment {}/{}".format(self.confirmed, total), settings=settings)
+        failures = 0
+        while not self.done():
+            mc = None
+            confirmed = self.confirmed
+            try:
+                mc = Minecraft.create(address, port, playerName, settings,
+                                      transport() if callable(transport) else transport)
+                self._sendSegments(mc.conn, total)
+            except (socket.error, OSError) as e:
+                # retries counts drops in a row, progress starts the count again
+                if self.confirmed > confirmed:
+                    failures = 0
+                failures += 1
+                if failures > self.retries:
+                    raise
+                warn("connection lost at segment {}/{} ({}), retry in {}s".format(
+                    self.confirmed, total, e, self.retryDelay))
+                time.sleep(self.retryDelay)
+            finally:
+                if mc is not None:
+                    mc.conn.close()
+        log("build finished, {} segments".format(total), settings=settings)
+
+    def _sendSegments(self, conn, total):
+        sent = self.confirmed
+        while sent < total:
+            for f, args in self.segment(sent):
+                conn.send(f, args)
+            sent += 1
+            if sent - self.confirmed >= self.probeEvery or sent == total:
+                self.probe(conn)
+                self.confirmed = sent
+                self.save()
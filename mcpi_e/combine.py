@@ -0,0 +1,160 @@
+import atexit
+import socket
+import time
+import weakref
+from .util import flatten
+
+""" Write combining for setBlock
+
+    With settings.COMBINE_WRITES set to a number of cells, a connection
+    holds world.setBlock (and small world.setBlocks) commands back instead of
+    sending each one. A later write to the same cell replaces the earlier
+    one, and when the buffer is sent, neighbouring cells of the same block
+    go out as one world.setBlocks. Scripts keep working unchanged:
+
+        mc = Minecraft.create(server, 4711, name, Settings(COMBINE_WRITES=4096))
+
+    The buffer is sent
+      - when it holds COMBINE_WRITES cells,
+      - before any command that is not held itself (getBlock, player.setPos,
+        chat.post, a large setBlocks, ...), so commands reach the server in
+        the order they were made and a reply still means that every
+        command before it was applied,
+      - with the next setBlock that comes COMBINE_DELAY seconds or more
+        after the oldest held write,
+      - when the connection is closed or the script ends, and with
+        mc.flush().
+    There is no timer thread: COMBINE_DELAY is only looked at when the next
+    command is made. A script that sets blocks and then sleeps or waits for
+    input without making another call shows nothing until it does, call
+    mc.flush() before such a wait. A connection that is thrown away
+    without close() is not kept alive until the end, and the writes it
+    still holds are lost.
+"""
+
+# combiners with held writes are sent at exit, without keeping them alive
+_live = weakref.WeakSet()
+
+@atexit.register
+def _flushAtExit():
+    for combiner in list(_live):
+        try:
+            combiner.flush()
+        except (socket.error, OSError):
+            pass
+
+class WriteCombiner:
+    """Held setBlock writes of one connection"""
+    clock = staticmethod(time.time)
+
+    def __init__(self, conn, maxCells=4096, delay=0.05, expandLimit=64):
+        self.conn = conn
+        self.maxCells = maxCells
+        self.delay = delay
+        self.expandLimit = expandLimit
+        self.cells = {}     # (x, y, z) => (id, data)
+        self.since = 0.0
+        self.lo = self.hi = None
+        self.writes = 0
+        self.commands = 0
+        _live.add(self)
+
+    def intercept(self, f, data):
+        """Take a command that Connection.send is about to send => True if it was held"""
+        if self.cells and self.clock() - self.since >= self.delay:
+            self.flush()
+        if f == b"world.setBlock":
+            args = [int(v) for v in flatten(data)]
+            self.put(args[0], args[1], args[2], args[3], args[4] if len(args) > 4 else 0)
+            return True
+        if f == b"world.setBlocks":
+            args = [int(v) for v in flatten(data)]
+            lo = [min(args[i], args[i + 3]) for i in range(3)]
+            hi = [max(args[i], args[i + 3]) for i in range(3)]
+            ident, value = args[6], args[7] if len(args) > 7 else 0
+            volume = (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1)
+            if volume <= self.expandLimit:
+                for x in range(lo[0], hi[0] + 1):
+                    for y in range(lo[1], hi[1] + 1):
+                        for z in range(lo[2], hi[2] + 1):
+                            self.put(x, y, z, ident, value)
+                return True
+            # sent right away, the held cells it covers would be overwritten anyway
+            self.drop(lo, hi)
+        # everything else goes out after the writes made before it
+        if self.cells:
+            self.flush()
+        return False
+
+    def put(self, x, y, z, ident, value=0):
+        """Hold one block write"""
+        if not self.cells:
+            self.since = self.clock()
+            self.lo, self.hi = [x, y, z], [x, y, z]
+        else:
+            self.lo = [min(self.lo[0], x), min(self.lo[1], y), min(self.lo[2], z)]
+            self.hi = [max(self.hi[0], x), max(self.hi[1], y), max(self.hi[2], z)]
+        self.cells[(x, y, z)] = (ident, value)
+        self.writes += 1
+        if len(self.cells) >= self.maxCells:
+            self.flush()
+
+    def drop(self, lo, hi):
+        """Forget held cells inside the cuboid lo..hi"""
+        if self.cells and self._touches(lo, hi):
+            for key in [k for k in self.cells if _inside(k, lo, hi)]:
+                del self.cells[key]
+
+    def _touches(self, lo, hi):
+        return all(lo[i] <= self.hi[i] and self.lo[i] <= hi[i] for i in range(3))
+
+    def flush(self):
+        """Send the held writes as merged cuboids => number of commands sent"""
+        if not self.cells:
+            return 0
+        span = max(1, self.conn.settings.MAX_SETBLOCKS_LENGTH // 3)
+        lines = []
+        for x0, y0, z0, x1, y1, z1, ident, value in cuboids(self.cells, span):
+            if x0 == x1 and y0 == y1 and z0 == z1:
+                lines.append(b"world.setBlock(%d,%d,%d,%d,%d)\n" % (x0, y0, z0, ident, value))
+            else:
+                lines.append(b"world.setBlocks(%d,%d,%d,%d,%d,%d,%d,%d)\n" % (x0, y0, z0, x1, y1, z1, ident, value))
+        self.cells = {}
+        self.commands += len(lines)
+        self.conn._send(b"".join(lines))
+        return len(lines)
+
+    def close(self):
+        """Send the held writes, a closed combiner is no longer flushed at exit"""
+        _live.discard(self)
+        self.flush()
+
+def _inside(key, lo, hi):
+    return lo[0] <= key[0] <= hi[0] and lo[1] <= key[1] <= hi[1] and lo[2] <= key[2] <= hi[2]
+
+def cuboids(cells, span=None):
+    """Merge {(x,y,z): (id, data)} into boxes => [(x0,y0,z0,x1,y1,z1,id,data)]
+
+    Like voxel.boxes, runs along z are merged first, then across x and y,
+    but in plain Python so the connection does not need NumPy."""
+    boxes = [(x, y, z, x, y, z, b[0], b[1]) for (x, y, z), b in cells.items()]
+    for axis in (2, 0, 1):
+        boxes = _merge(boxes, axis, span)
+    return boxes
+
+def _merge(boxes, axis, span):
+    """Merge boxes that are equal apart from axis and touch along it"""
+    other = [i for i in range(6) if i % 3 != axis] + [6, 7]
+    boxes.sort(key=lambda b: tuple(b[i] for i in other) + (b[axis],))
+    merged = []
+    for b in boxes:
+        if merged:
+            last = merged[-1]
+            if (last[axis + 3] + 1 == b[axis] and all(last[i] == b[i] for i in other)
+                    and (not span or b[axis + 3] - last[axis] < span)):
+                last = list(last)
+                last[axis + 3] = b[axis + 3]
+                merged[-1] = tuple(last)
+                continue
+        merged.append(b)
+    return merged
@@ -1,10 +1,12 @@
 import socket
-import select
 import sys
 import time
+from collections import deque
 from .util import flatten_parameters_to_bytestring
 from .logger import *
-import mcpi_e.settings as settings
+from .settings import Settings
+from .transport import connect
+from .combine import WriteCombiner
 
 """ @author: Aron Nieminen, Mojang AB"""
 
@@ -15,18 +17,34 @@ class Connection:
     """Connection to a Minecraft Pi game"""
     RequestFailed = "Fail"
 
-    def __init__(self, address, port):
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.connect((address, port))
+    def __init__(self, address="localhost", port=4711, settings=None, transport=None):
+        """Connects to address:port, or uses the given transport (see mcpi_e.transport)"""
+        self.settings = settings if settings is not None else Settings()
+        self.transport = transport if transport is not None else connect(address, port)
+        self.socket = getattr(self.transport, "socket", None)
         self.lastSent = ""
+        self.waiting = deque()
+        self.stash = deque()
+        self.tracer = None
+        self.meta = None
+        self.combiner = None
+        if self.settings.COMBINE_WRITES:
+            self.combiner = WriteCombiner(self, self.settings.COMBINE_WRITES, self.settings.COMBINE_DELAY)
+        self.capabilities = set()
+
+    @property
+    def pending(self):
+        """Number of requests whose reply has not been read yet"""
+        return len(self.waiting)
 
     def drain(self):
         """Drains the socket of incoming data"""
         while True:
-            readable, _, _ = select.select([self.socket], [], [], 0.0)
-            if not readable:
+            if not self.transport.ready(0.0):
                 break
-            data = self.socket.recv(1500)
+            data = self.transport.recv(1500)
+            if not data:
+                raise socket.error("connection closed by the server")
             e =  "Drained Data: <%s>\n"%data.strip()
             e += "Last Message: <%s>\n"%self.lastSent.strip()
             sys.stderr.write(e)
@@ -38,67 +56,203 @@ class Connection:
         The protocol uses CP437 encoding - https://en.wikipedia.org/wiki/Code_page_437
         which is mildly distressing as it can't encode all of Unicode.
         """
-        debug("function called:"+f.decode("utf-8") ,data)
-   
+        cfg = self.settings
+        if cfg.SHOW_DEBUG:
+            debug("function called:"+f.decode("utf-8"), data, settings=cfg)
+
         if(f==b"world.setBlock"):
-             if( abs(data[0][1])>256):
-                warn("max height of building is 256")
-                return           
-        
+             if( abs(data[0][1])>cfg.MAX_HEIGHT):
+                warn("max height of building is {}".format(cfg.MAX_HEIGHT))
+                return
+
         #verify setblocks
         if(f==b"world.setBlocks"):
-            debug(len(data))
-            debug(len(data[0]))
-            debug("setblock arg x={} y={} z={} x1={} y1={} z1={} ".format(data[0][0],data[0][1],data[0][2],data[0][3],data[0][4],data[0][5]))
             if(len(data)<1 or len(data[0])<6):
                 warn("setBlocks need a6 input parameters setBlocks(x0,y0,z0,x1,y1,z1,blockId)")
                 return
-         
-            
-            if( abs(data[0][1])>256 or abs(data[0][4])>256):
-                warn("max height of building is 256")
+
+            if( abs(data[0][1])>cfg.MAX_HEIGHT or abs(data[0][4])>cfg.MAX_HEIGHT):
+                warn("max height of building is {}".format(cfg.MAX_HEIGHT))
                 return
             h=abs(data[0][1]-data[0][4])
             w=abs(data[0][0]-data[0][3])
             l=abs(data[0][2]-data[0][5])
             length=h+w+l
             blocksCount=h*w*l
-            debug("set blocks size: h:{}, w:{},l:{}, sum of HWL: {}, total blocks: {} ".format(h,w,l,length,blocksCount))
-         
-            if(length>300 and blocksCount>1000):
-                warn("setBlocks failed, Please limit your block size (h+l+w)<300 and h*l*w<1000. (length:{},blocksize:{})".format(str(length),str(blocksCount)))
+            if cfg.SHOW_DEBUG:
+                debug("set blocks size: h:{}, w:{},l:{}, sum of HWL: {}, total blocks: {} ".format(h,w,l,length,blocksCount), settings=cfg)
+
+            if(length>cfg.MAX_SETBLOCKS_LENGTH and blocksCount>cfg.MAX_SETBLOCKS_COUNT):
+                warn("setBlocks failed, Please limit your block size (h+l+w)<{} and h*l*w<{}. (length:{},blocksize:{})".format(
+                    cfg.MAX_SETBLOCKS_LENGTH,cfg.MAX_SETBLOCKS_COUNT,str(length),str(blocksCount)))
                 return
-      
-            
-            #print("methods {} not allowed!".format(f.decode("utf-8")))
-            #return
-      
+
+        combiner = self.combiner
+        if combiner is not None and combiner.intercept(f, data):
+            return True
+
+        self._send(self._encode(f, data))
+        return True
+
+    def _encode(self, f, data):
+        """The line of a command as it is sent"""
+        tracer = self.tracer
+        if tracer is None:
+            return b"".join([f, b"(", flatten_parameters_to_bytestring(data), b")", b"\n"])
+        begin = tracer.clock()
         s = b"".join([f, b"(", flatten_parameters_to_bytestring(data), b")", b"\n"])
-        self._send(s)     
-        
+        tracer.add("encode", begin)
+        return s
+
 
     def _send(self, s):
         """
         The actual socket interaction from self.send, extracted for easier mocking
         and testing
         """
-        time.sleep(settings.SYS_SPEED) #slow down the running speed
-        print("sysspeed:",settings.SYS_SPEED)
-        self.drain()
+        tracer = self.tracer
+        if tracer is not None:
+            return self._tracedSend(s, tracer)
+        speed = self.settings.SYS_SPEED
+        if speed > 0:
+            time.sleep(speed) #slow down the running speed
+        if not self.waiting:
+            self.drain()
         self.lastSent = s
 
-        self.socket.sendall(s)
+        self.transport.sendall(s)
+
+    def _tracedSend(self, s, tracer):
+        """_send that records the time of each step"""
+        speed = self.settings.SYS_SPEED
+        if speed > 0:
+            begin = tracer.clock()
+            time.sleep(speed)
+            tracer.add("throttle", begin)
+        if not self.waiting:
+            begin = tracer.clock()
+            self.drain()
+            tracer.add("drain", begin)
+        self.lastSent = s
+        begin = tracer.clock()
+        self.transport.sendall(s)
+        tracer.add("write", begin)
 
     def receive(self):
         """Receives data. Note that the trailing newline '\n' is trimmed"""
-        s = self.socket.makefile("r").readline().rstrip("\n")
+        if self.stash:
+            s = self.stash.popleft()
+        elif self.waiting:
+            s = self.waiting.popleft()()
+        else:
+            s = self._readline()
         if s == Connection.RequestFailed:
             raise RequestError("%s failed"%self.lastSent.strip())
         return s
 
+    def _readline(self):
+        if self.tracer is not None:
+            begin = self.tracer.clock()
+            s = self.transport.readline()
+            self.tracer.add("receive", begin)
+        else:
+            s = self.transport.readline()
+        if not s:
+            raise socket.error("connection closed by the server")
+        return s.decode("utf-8", "replace").rstrip("\n")
+
+    def _readBinary(self):
+        """Reads a binary reply, a line with the byte count followed by the bytes"""
+        s = self._readline()
+        if s == Connection.RequestFailed:
+            return s
+        n = int(s)
+        data = self.transport.read(n)
+        if len(data) < n:
+            raise socket.error("connection closed by the server")
+        return data
+
+    def _settle(self):
+        """Before a command whose reply is read right away: keeps the replies
+        of earlier requests for their own receive() and sends held writes"""
+        while self.waiting:
+            self.stash.append(self.waiting.popleft()())
+        self.flush()
+
     def sendReceive(self, *data):
         """Sends and receive data"""
+        self._settle()
         self.send(*data)
-        return self.receive()
-    
+        s = self._readline()
+        if s == Connection.RequestFailed:
+            raise RequestError("%s failed"%self.lastSent.strip())
+        return s
+
+    def sendReceiveBatch(self, f, argsList):
+        """Sends the command f once per item of argsList in a single write and reads the replies => [str]
+
+        Failed commands give Connection.RequestFailed in their place, the
+        others are not affected."""
+        self._settle()
+        cfg = self.settings
+        lines = []
+        for args in argsList:
+            if cfg.SHOW_DEBUG:
+                debug("function called:"+f.decode("utf-8"), (args,), settings=cfg)
+            lines.append(self._encode(f, (args,)))
+        if not lines:
+            return []
+        self._send(b"".join(lines))
+        return [self._readline() for _ in lines]
+
+    def request(self, *data):
+        """Sends a command without waiting for its reply
+
+        Replies arrive in the order the commands were sent and are read with
+        receive(). Incoming data is not drained while replies are pending."""
+        self.flush()
+        if self.send(*data):
+            self.waiting.append(self._readline)
+
+    def requestBinary(self, *data):
+        """Like request, for commands of the binary protocol that reply with bytes"""
+        self.flush()
+        if self.send(*data):
+            self.waiting.append(self._readBinary)
+
+    def sendBinary(self, f, args, payload):
+        """Sends a binary frame, the text line f(args) followed by the payload bytes
+
+        Only for servers that listed "binary" in negotiate()"""
+        self.flush()
+        self._send(self._encode(f, (args,)) + payload)
+
+    def negotiate(self, timeout=1.0):
+        """Asks the server which protocol extensions it supports => set of names
+
+        Plain RaspberryJuice answers Fail and Minecraft Pi does not answer, in
+        both cases the set stays empty and the text protocol is used."""
+        self.capabilities = set()
+        self._settle()
+        self.send(b"mcpie.capabilities")
+        if self.transport.ready(timeout):
+            s = self._readline()
+            if s != Connection.RequestFailed:
+                self.capabilities = set(c for c in s.split(",") if c)
+        return self.capabilities
+
+    def flush(self):
+        """Sends the setBlock writes held back by settings.COMBINE_WRITES"""
+        if self.combiner is not None:
+            self.combiner.flush()
+
+    def close(self):
+        """Closes the transport, errors from an already dropped connection are ignored"""
+        try:
+            if self.combiner is not None:
+                self.combiner.close()
+            self.transport.close()
+        except socket.error:
+            pass
+
  
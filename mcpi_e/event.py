@@ -65,3 +65,25 @@ class ProjectileEvent:
     @staticmethod
     def Hit(x, y, z, face, originName, targetName):
         return ProjectileEvent(BlockEvent.HIT, x, y, z, face, originName, targetName)
+
+class BlockChangeEvent:
+    """A block that changed between two scans of a RegionWatcher"""
+    CHANGED = 0
+
+    def __init__(self, type, x, y, z, old, new):
+        self.type = type
+        self.pos = Vec3(x, y, z)
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        sType = {
+            BlockChangeEvent.CHANGED: "BlockChangeEvent.CHANGED"
+        }.get(self.type, "???")
+
+        return "BlockChangeEvent(%s, %d, %d, %d, %d, %d)"%(
+            sType,self.pos.x,self.pos.y,self.pos.z,self.old,self.new)
+
+    @staticmethod
+    def Changed(x, y, z, old, new):
+        return BlockChangeEvent(BlockChangeEvent.CHANGED, x, y, z, old, new)
@@ -0,0 +1,143 @@
+import math
+import numpy as np
+from . import voxel
+from .scan import readRegion
+
+""" Flood fill and connected regions
+
+    The region is read once with readRegion, the connected cells are found
+    in the local array and the result is written back as merged setBlocks
+    boxes. Nothing recurses: connected() grows the region a whole frontier
+    at a time and label() joins neighbour labels with NumPy until they
+    agree, so large areas need neither a deep stack nor one getBlock per
+    cell.
+
+    Cells are connected through their faces (connectivity=6) or also
+    through edges and corners (connectivity=26). A fill that would cover
+    more than limit cells raises FillLimitError before anything is sent.
+
+    Example, drain a lake:
+        replaceConnected(mc, (x, y, z), (x - 60, y - 20, z - 60, x + 60, y, z + 60),
+                         [block.WATER_STATIONARY.id, block.WATER_FLOWING.id], block.AIR.id)
+"""
+
+class FillLimitError(ValueError):
+    pass
+
+def _offsets(shape, connectivity):
+    """Flat index steps to the neighbours of a cell in an array of shape"""
+    if connectivity == 6:
+        steps = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+    elif connectivity == 26:
+        steps = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if dx or dy or dz]
+    else:
+        raise ValueError("connectivity must be 6 or 26")
+    _, ny, nz = shape
+    return np.array([dx * ny * nz + dy * nz + dz for dx, dy, dz in steps], dtype=np.int64)
+
+def connected(mask, seeds, connectivity=6, limit=None):
+    """Cells of mask connected to the seed cells [(x, y, z)] => bool array like mask
+
+    Raises FillLimitError when the region has more than limit cells."""
+    mask = np.asarray(mask, dtype=bool)
+    # a border of False cells, so neighbour steps never wrap around an edge
+    padded = np.pad(mask, 1)
+    flat = padded.ravel()
+    offsets = _offsets(padded.shape, connectivity)
+    seeds = np.atleast_2d(np.asarray(seeds, dtype=np.int64)) + 1
+    frontier = np.ravel_multi_index(seeds.T, padded.shape)
+    frontier = np.unique(frontier[flat[frontier]])
+    visited = np.zeros(flat.shape, dtype=bool)
+    visited[frontier] = True
+    count = len(frontier)
+    while len(frontier):
+        if limit is not None and count > limit:
+            raise FillLimitError("connected region has more than {} cells".format(limit))
+        step = (frontier[:, None] + offsets[None, :]).ravel()
+        step = np.unique(step[flat[step] & ~visited[step]])
+        visited[step] = True
+        count += len(step)
+        frontier = step
+    return visited.reshape(padded.shape)[1:-1, 1:-1, 1:-1]
+
+def label(mask, connectivity=6):
+    """Number the connected parts of mask => (int32 array, 0 outside mask and 1..count inside, count)"""
+    mask = np.asarray(mask, dtype=bool)
+    padded = np.pad(mask, 1)
+    flat = padded.ravel()
+    cells = np.flatnonzero(flat)
+    if len(cells) == 0:
+        return np.zeros(mask.shape, dtype=np.int32), 0
+    # each pair of neighbours once
+    offsets = _offsets(padded.shape, connectivity)
+    a = np.concatenate([cells[flat[cells + o]] for o in offsets if o > 0])
+    b = np.concatenate([cells[flat[cells + o]] + o for o in offsets if o > 0])
+    parent = np.arange(len(flat), dtype=np.int64)
+    while len(a):
+        pa, pb = parent[a], parent[b]
+        lo, hi = np.minimum(pa, pb), np.maximum(pa, pb)
+        differ = lo != hi
+        if not differ.any():
+            break
+        # hook the larger label under the smaller one, then shorten the chains
+        np.minimum.at(parent, hi[differ], lo[differ])
+        while True:
+            jumped = parent[parent]
+            if (jumped == parent).all():
+                break
+            parent = jumped
+        # equal roots stay equal, only the other pairs are looked at again
+        a, b = a[differ], b[differ]
+    roots = parent[cells]
+    _, numbers = np.unique(roots, return_inverse=True)
+    labels = np.zeros(len(flat), dtype=np.int32)
+    labels[cells] = numbers.reshape(-1) + 1
+    return labels.reshape(padded.shape)[1:-1, 1:-1, 1:-1], int(numbers.max()) + 1
+
+def _read(mc, bounds):
+    x0, y0, z0, x1, y1, z1 = (int(v) for v in bounds)
+    return readRegion(mc, x0, y0, z0, x1, y1, z1)
+
+def _region(mc, pos, bounds, match, connectivity, limit, closed):
+    lo, ids = _read(mc, bounds)
+    seed = (int(math.floor(pos[0])) - lo.x, int(math.floor(pos[1])) - lo.y, int(math.floor(pos[2])) - lo.z)
+    if not all(0 <= seed[i] < ids.shape[i] for i in range(3)):
+        raise ValueError("start {} is outside the bounds".format(tuple(pos)))
+    if match is None:
+        match = [ids[seed]]
+    region = connected(np.isin(ids, match), [seed], connectivity, limit)
+    if closed and (region[0].any() or region[-1].any() or region[:, 0].any() or region[:, -1].any()
+                   or region[:, :, 0].any() or region[:, :, -1].any()):
+        raise FillLimitError("region reaches the edge of the bounds, it is not closed")
+    return lo, region
+
+def _write(mc, lo, region, blockId, data):
+    rows = voxel.boxes(np.where(region, int(blockId), -1), data, skip=-1, span=voxel.spanFor(mc.settings))
+    return voxel.writeBoxes(mc, rows, lo)
+
+def floodFill(mc, pos, bounds, blockId, data=0, connectivity=6, limit=100000, closed=False):
+    """Fill the cells like the one at pos and connected to it, within bounds (x0,y0,z0,x1,y1,z1) => commands sent
+
+    With closed=True a region that touches the edge of bounds is not filled
+    (the room has a hole), a FillLimitError is raised instead."""
+    lo, region = _region(mc, pos, bounds, None, connectivity, limit, closed)
+    return _write(mc, lo, region, blockId, data)
+
+def replaceConnected(mc, pos, bounds, match, blockId, data=0, connectivity=6, limit=100000, closed=False):
+    """Replace the cells with an id in match that are connected to pos, within bounds => commands sent"""
+    lo, region = _region(mc, pos, bounds, list(match), connectivity, limit, closed)
+    return _write(mc, lo, region, blockId, data)
+
+def components(mc, bounds, match, connectivity=6, minSize=1):
+    """Connected structures made of the ids in match => (Vec3 min corner, labels array, [sizes])
+
+    Labels are 1..count, parts smaller than minSize are dropped and the
+    others numbered again from 1."""
+    lo, ids = _read(mc, bounds)
+    labels, count = label(np.isin(ids, list(match)), connectivity)
+    sizes = np.bincount(labels.ravel(), minlength=count + 1)
+    keep = np.flatnonzero(sizes >= minSize)
+    keep = keep[keep > 0]
+    numbers = np.zeros(count + 1, dtype=np.int32)
+    numbers[keep] = np.arange(1, len(keep) + 1)
+    return lo, numbers[labels], sizes[keep].tolist()
@@ -0,0 +1,109 @@
+import numpy as np
+from . import block
+from . import voxel
+
+""" Pixel art: draw an image array with coloured blocks
+
+    The image is an array of shape (height, width, 3) or (height, width, 4)
+    with 0-255 RGB(A) values, e.g. numpy.asarray(PIL.Image.open(path)).
+    Every pixel is matched to the nearest colour of a palette in one NumPy
+    step and equal neighbours are merged into setBlocks boxes, so a 256x256
+    picture is sent as a few thousand commands instead of 65536 setBlock.
+
+    Example:
+        drawImage(mc, pixels, x, y, z, plane="xy", dither=True)
+"""
+
+class Palette:
+    """Blocks with the RGB colour they are drawn as, [(Block, (r,g,b))]"""
+    def __init__(self, entries):
+        self.blocks = [b for b, _ in entries]
+        self.colors = np.array([c for _, c in entries], dtype=np.float32)
+        self.ids = np.array([b.id for b in self.blocks], dtype=np.int32)
+        self.data = np.array([b.data for b in self.blocks], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def match(self, pixels, dither=False, chunk=65536):
+        """Index of the nearest palette colour of every pixel => int array of shape pixels.shape[:-1]"""
+        rgb = np.asarray(pixels, dtype=np.float32)[..., :3]
+        shape = rgb.shape[:-1]
+        if dither:
+            rgb = rgb + _bayer(shape) * _spread(self.colors)
+        flat = rgb.reshape(-1, 3)
+        out = np.empty(len(flat), dtype=np.int32)
+        # |a-b|^2 = |a|^2 - 2ab + |b|^2, |a|^2 is the same for every colour of a pixel
+        norms = (self.colors ** 2).sum(axis=1)
+        for i in range(0, len(flat), chunk):
+            part = flat[i:i + chunk]
+            out[i:i + chunk] = np.argmin(norms - 2.0 * part.dot(self.colors.T), axis=1)
+        return out.reshape(shape)
+
+_BAYER4 = np.array([[ 0,  8,  2, 10],
+                    [12,  4, 14,  6],
+                    [ 3, 11,  1,  9],
+                    [15,  7, 13,  5]], dtype=np.float32) / 16.0 - 0.5
+
+def _bayer(shape):
+    """Ordered dither offsets in [-0.5, 0.5) tiled over an image, broadcastable to RGB"""
+    h, w = shape
+    tile = np.tile(_BAYER4, ((h + 3) // 4, (w + 3) // 4))[:h, :w]
+    return tile[..., None]
+
+def _spread(colors):
+    """Typical distance between neighbouring palette colours, the dither amplitude"""
+    if len(colors) < 2:
+        return 0.0
+    d = np.sqrt(((colors[:, None, :] - colors[None, :, :]) ** 2).sum(axis=2))
+    d[d == 0] = np.inf
+    return float(np.median(d.min(axis=1)))
+
+_COLORS = [(234, 236, 237), (240, 118, 19), (189, 68, 179), (58, 175, 217),
+           (248, 198, 39), (112, 185, 25), (237, 141, 172), (62, 68, 71),
+           (142, 142, 134), (21, 137, 145), (121, 42, 172), (53, 57, 157),
+           (114, 71, 40), (84, 109, 27), (160, 39, 34), (20, 21, 25)]
+
+WOOL_PALETTE = Palette([(block.WOOL.withData(d), c) for d, c in enumerate(_COLORS)])
+STAINED_GLASS_PALETTE = Palette([(block.STAINED_GLASS.withData(d), c) for d, c in enumerate(_COLORS)])
+
+# image axes (row down, column right) => world axes for each plane
+PLANES = {
+    "xy": ("-y", "+x"),
+    "zy": ("-y", "+z"),
+    "xz": ("+z", "+x"),
+}
+
+def imageBoxes(pixels, plane="xy", palette=WOOL_PALETTE, dither=False, alpha=128, span=None):
+    """Match an image and merge it into boxes relative to the image corner
+
+    plane "xy" and "zy" stand the picture upright with its bottom row at
+    y=0, "xz" lays it flat. Pixels with alpha below the threshold are left
+    out. => array of (x0,y0,z0,x1,y1,z1,id,data)"""
+    if plane not in PLANES:
+        raise ValueError("plane must be one of {}".format(", ".join(sorted(PLANES))))
+    pixels = np.asarray(pixels)
+    if pixels.ndim != 3 or pixels.shape[2] not in (3, 4):
+        raise ValueError("expected an image array of shape (height, width, 3 or 4)")
+    index = palette.match(pixels, dither)
+    ids = palette.ids[index]
+    data = palette.data[index]
+    if pixels.shape[2] == 4:
+        ids = np.where(pixels[..., 3] >= alpha, ids, -1)
+    ids, data = _orient(ids, plane), _orient(data, plane)
+    return voxel.boxes(ids, data, skip=-1, span=span)
+
+def _orient(grid, plane):
+    """Turn a (row, column) grid into an [x, y, z] volume for plane"""
+    rows, cols = PLANES[plane]
+    if rows[0] == "-":
+        grid = grid[::-1]
+    axes = {rows[1]: 0, cols[1]: 1}
+    order = [axes[a] for a in "xyz" if a in axes]
+    shape = [grid.shape[axes[a]] if a in axes else 1 for a in "xyz"]
+    return np.transpose(grid, order).reshape(shape)
+
+def drawImage(mc, pixels, x, y, z, plane="xy", palette=WOOL_PALETTE, dither=False, alpha=128):
+    """Draw an image with its bottom left corner at (x,y,z) => number of commands sent"""
+    rows = imageBoxes(pixels, plane, palette, dither, alpha, voxel.spanFor(mc.settings))
+    return voxel.writeBoxes(mc, rows, (x, y, z))
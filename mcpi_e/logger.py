@@ -22,12 +22,20 @@ class BColors:
         self.FAIL = ''
         self.ENDC = ''
 
-def debug(*msg):
-    if(settings.SHOW_DEBUG):
-        print(BColors.TGREY,msg,BColors.ENDC)
+def show(color, *msg):
+    print(color,msg,BColors.ENDC)
 
-def log(*msg):
-    if(settings.SHOW_Log):
-        print(BColors.LOG,msg,BColors.ENDC)
+# debug and log follow the flags of the Settings given, e.g. mc.settings,
+# and the module level defaults in mcpi_e.settings without one
+def debug(*msg, settings=None):
+    if(_flags(settings).SHOW_DEBUG):
+        show(BColors.TGREY,*msg)
+
+def log(*msg, settings=None):
+    if(_flags(settings).SHOW_Log):
+        show(BColors.LOG,*msg)
+
+def _flags(config):
+    return settings if config is None else config
 def warn(*msg):
-    print(BColors.WARNING,msg,BColors.ENDC)
\ No newline at end of file
+    show(BColors.WARNING,*msg)
\ No newline at end of file
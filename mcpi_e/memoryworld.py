@@ -0,0 +1,489 @@
+import math
+import numpy as np
+from . import entity as entities
+from .entity import Entity
+from .transport import MemoryTransport
+from .settings import Settings
+from .util import expectsReply
+from . import voxel
+
+""" A Minecraft world in memory
+
+    MemoryWorld answers the same text commands as RaspberryJuice, but keeps
+    blocks in NumPy chunks inside the Python process. Connect to it through a
+    MemoryTransport to run build scripts offline at full speed, check the
+    result with the normal Minecraft API, save it as a snapshot or send it
+    to a real server later.
+
+    Example:
+        world = MemoryWorld()
+        mc = world.connect("steve")
+        mc.setBlocks(0, 0, 0, 9, 9, 9, block.STONE.id)
+        world.writeTo(Minecraft.create(address, port, name))
+"""
+
+CHUNK = 16
+
+def _ints(args):
+    return [int(float(a)) for a in args]
+
+def _floats(args):
+    return [float(a) for a in args]
+
+class MemoryWorld:
+    """Blocks, players and entities of an offline world"""
+    def __init__(self, height=256, record=False):
+        self.height = height
+        self.chunks = {}
+        self.players = {}
+        self.positions = {}
+        self.rotations = {}    # id => [yaw, pitch] in degrees
+        self.entities = {}
+        self.chat = []
+        self.checkpoint = None
+        self.record = record
+        self.commands = []
+        self.spawned = []      # ids of the recorded world.spawnEntity commands
+        self.nextId = 1
+        self.types = dict((e.id, e) for e in vars(entities).values() if isinstance(e, Entity))
+
+    def transport(self):
+        """A new MemoryTransport for Connection or Minecraft.create"""
+        return MemoryTransport(self)
+
+    def connect(self, playerName="", settings=None):
+        """A Minecraft instance connected to this world, without the SYS_SPEED pause and debug output by default"""
+        from .minecraft import Minecraft
+        if settings is None:
+            settings = Settings(SYS_SPEED=0, SHOW_DEBUG=False)
+        return Minecraft.create(playerName=playerName, settings=settings, transport=self.transport())
+
+    # blocks
+
+    def _chunk(self, cx, cz, create=False):
+        c = self.chunks.get((cx, cz))
+        if c is None and create:
+            c = self.chunks[(cx, cz)] = (np.zeros((CHUNK, self.height, CHUNK), dtype=np.uint16),
+                                         np.zeros((CHUNK, self.height, CHUNK), dtype=np.uint8))
+        return c
+
+    def _overlaps(self, x0, z0, x1, z1):
+        """(chunk, x slice in chunk, z slice in chunk, x slice in box, z slice in box) for a box"""
+        for cx in range(x0 // CHUNK, x1 // CHUNK + 1):
+            for cz in range(z0 // CHUNK, z1 // CHUNK + 1):
+                ax, bx = max(x0, cx * CHUNK), min(x1, cx * CHUNK + CHUNK - 1)
+                az, bz = max(z0, cz * CHUNK), min(z1, cz * CHUNK + CHUNK - 1)
+                yield ((cx, cz), slice(ax - cx * CHUNK, bx - cx * CHUNK + 1), slice(az - cz * CHUNK, bz - cz * CHUNK + 1),
+                       slice(ax - x0, bx - x0 + 1), slice(az - z0, bz - z0 + 1))
+
+    def setBlocks(self, x0, y0, z0, x1, y1, z1, id, data=0):
+        """Fill a cuboid, either a single block type or [x, y, z] arrays of ids and data"""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        z0, z1 = min(z0, z1), max(z0, z1)
+        ids = np.asarray(id)
+        data = np.asarray(data)
+        # checked before anything is written, a Fail must not leave half a cuboid
+        if ids.size and (ids.min() < 0 or ids.max() > 0xFFFF or data.min() < 0 or data.max() > 0xFF):
+            raise ValueError("block id or data out of range")
+        # blocks outside the height of the world are dropped
+        a, b = max(y0, 0), min(y1, self.height - 1)
+        if a > b:
+            return
+        for key, sx, sz, bx, bz in self._overlaps(x0, z0, x1, z1):
+            cids, cdata = self._chunk(key[0], key[1], True)
+            if ids.ndim:
+                cids[sx, a:b + 1, sz] = ids[bx, a - y0:b - y0 + 1, bz]
+            else:
+                cids[sx, a:b + 1, sz] = ids
+            if data.ndim:
+                cdata[sx, a:b + 1, sz] = data[bx, a - y0:b - y0 + 1, bz]
+            else:
+                cdata[sx, a:b + 1, sz] = data
+
+    def getBlocks(self, x0, y0, z0, x1, y1, z1):
+        """A cuboid => ([x, y, z] ids, [x, y, z] data), air where nothing was set"""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        z0, z1 = min(z0, z1), max(z0, z1)
+        shape = (x1 - x0 + 1, y1 - y0 + 1, z1 - z0 + 1)
+        ids = np.zeros(shape, dtype=np.int32)
+        data = np.zeros(shape, dtype=np.int32)
+        a, b = max(y0, 0), min(y1, self.height - 1)
+        if a > b:
+            return ids, data
+        for key, sx, sz, bx, bz in self._overlaps(x0, z0, x1, z1):
+            c = self._chunk(*key)
+            if c is not None:
+                ids[bx, a - y0:b - y0 + 1, bz] = c[0][sx, a:b + 1, sz]
+                data[bx, a - y0:b - y0 + 1, bz] = c[1][sx, a:b + 1, sz]
+        return ids, data
+
+    def getBlock(self, x, y, z):
+        """(id, data) of one block"""
+        c = self._chunk(x // CHUNK, z // CHUNK)
+        if c is None or not 0 <= y < self.height:
+            return 0, 0
+        return int(c[0][x % CHUNK, y, z % CHUNK]), int(c[1][x % CHUNK, y, z % CHUNK])
+
+    def getHeight(self, x, z):
+        """y of the highest block that is not air, like world.getHeight"""
+        c = self._chunk(x // CHUNK, z // CHUNK)
+        if c is None:
+            return 0
+        solid = np.flatnonzero(c[0][x % CHUNK, :, z % CHUNK])
+        return int(solid[-1]) if len(solid) else 0
+
+    def bounds(self):
+        """Cuboid of all chunks that were written => (x0, y0, z0, x1, y1, z1), None for an empty world"""
+        if not self.chunks:
+            return None
+        cx = [k[0] for k in self.chunks]
+        cz = [k[1] for k in self.chunks]
+        return (min(cx) * CHUNK, 0, min(cz) * CHUNK,
+                max(cx) * CHUNK + CHUNK - 1, self.height - 1, max(cz) * CHUNK + CHUNK - 1)
+
+    def save(self, path):
+        """Write every chunk to a Snapshot file"""
+        from .snapshot import Snapshot
+        with Snapshot(path, "w") as snap:
+            for (cx, cz), (ids, data) in sorted(self.chunks.items()):
+                snap.add((cx * CHUNK, 0, cz * CHUNK), ids, data)
+
+    def writeTo(self, mc, skipAir=True):
+        """Send the blocks to another world as merged setBlocks boxes => number of commands"""
+        span = voxel.spanFor(mc.settings)
+        count = 0
+        for (cx, cz), (ids, data) in sorted(self.chunks.items()):
+            volume = ids.astype(np.int32)
+            if skipAir:
+                volume[volume == 0] = -1
+            rows = voxel.boxes(volume, data, skip=-1, span=span)
+            count += voxel.writeBoxes(mc, rows, (cx * CHUNK, 0, cz * CHUNK))
+        return count
+
+    def replay(self, conn):
+        """Send the recorded commands (record=True) to a Connection as they were received
+
+        Spawned entities get new ids in the other world, later commands
+        that name one of them are sent with its new id."""
+        ids = {}
+        spawned = iter(self.spawned)
+        for line in self.commands:
+            name = line[:line.find(b"(")]
+            if name == b"world.removeEntity" or name.startswith(b"entity."):
+                first, comma, rest = line[len(name) + 1:].partition(b",")
+                if not comma:
+                    first, rest = first[:first.rfind(b")")], first[first.rfind(b")"):]
+                if first in ids:
+                    line = name + b"(" + ids[first] + comma + rest
+            conn._send(line)
+            if expectsReply(name.decode("utf-8")):
+                reply = conn._readline()
+                if name == b"world.spawnEntity":
+                    ids[str(next(spawned)).encode("utf-8")] = reply.encode("utf-8")
+
+    # protocol
+
+    def execute(self, data):
+        """Run one or more command lines => reply bytes"""
+        out = []
+        for line in data.split(b"\n"):
+            if not line:
+                continue
+            reply = self.command(line)
+            if reply is not None:
+                out.append(reply.encode("utf-8") + b"\n")
+        return b"".join(out)
+
+    def command(self, line):
+        """Run one command line => reply str or None"""
+        text = line.decode("utf-8", "replace")
+        start = text.find("(")
+        name = text[:start]
+        body = text[start + 1:text.rfind(")")]
+        args = body.split(",") if body else []
+        handler = self.HANDLERS.get(name)
+        # unknown or wrong commands are answered with Fail, but only when the
+        # client waits for a reply, an extra line would be read as the next one
+        if handler is None:
+            return "Fail" if expectsReply(name) else None
+        try:
+            reply = handler(self, args, body)
+        except (ValueError, IndexError, KeyError, OverflowError):
+            reply = "Fail" if expectsReply(name) else None
+        if self.record and handler in self._WRITES:
+            self.commands.append(line + b"\n")
+            if name == "world.spawnEntity":
+                self.spawned.append(reply)
+        return reply
+
+    def _setBlock(self, args, body):
+        x, y, z, id = _ints(args[:4])
+        data = int(args[4]) if len(args) > 4 else 0
+        self.setBlocks(x, y, z, x, y, z, id, data)
+
+    def _setBlocks(self, args, body):
+        x0, y0, z0, x1, y1, z1, id = _ints(args[:7])
+        data = int(args[7]) if len(args) > 7 else 0
+        self.setBlocks(x0, y0, z0, x1, y1, z1, id, data)
+
+    def _getBlock(self, args, body):
+        return str(self.getBlock(*_ints(args[:3]))[0])
+
+    def _getBlockWithData(self, args, body):
+        return "%d,%d" % self.getBlock(*_ints(args[:3]))
+
+    def _getBlocks(self, args, body):
+        ids, _ = self.getBlocks(*_ints(args[:6]))
+        # the server lists blocks y by y, then x, then z
+        return ",".join(map(str, ids.transpose(1, 0, 2).ravel().tolist()))
+
+    def _getHeight(self, args, body):
+        return str(self.getHeight(*_ints(args[:2])))
+
+    def _newId(self):
+        self.nextId += 1
+        return self.nextId - 1
+
+    def _getPlayerId(self, args, body):
+        # players join when they are first asked for
+        if body not in self.players:
+            self.players[body] = self._newId()
+            self.positions[self.players[body]] = [0.5, float(self.height // 2), 0.5]
+        return str(self.players[body])
+
+    def _getPlayerIds(self, args, body):
+        if not self.players:
+            return "Fail"
+        return "|".join(str(i) for i in self.players.values())
+
+    def _getName(self, args, body):
+        id = int(args[0])
+        for name, pid in self.players.items():
+            if pid == id:
+                return name
+        return self.types[self.entities[id]].name
+
+    def _getEntityTypes(self, args, body):
+        return "|".join("%d,%s" % (e.id, e.name) for e in sorted(self.types.values(), key=lambda e: e.id))
+
+    def _spawnEntity(self, args, body):
+        x, y, z = _floats(args[:3])
+        type = int(args[3])
+        if type not in self.types:
+            return "Fail"
+        id = self._newId()
+        self.entities[id] = type
+        self.positions[id] = [x, y, z]
+        return str(id)
+
+    def _entityList(self, ids):
+        return "|".join("%d,%d,%s,%f,%f,%f" % ((id, self.entities[id], self.types[self.entities[id]].name)
+                                               + tuple(self.positions[id])) for id in ids)
+
+    def _getEntities(self, args, body):
+        type = int(args[0]) if args else -1
+        return self._entityList([id for id, t in sorted(self.entities.items()) if type == -1 or t == type])
+
+    def _removeEntity(self, args, body):
+        id = int(args[0])
+        if id in self.entities:
+            del self.entities[id]
+            del self.positions[id]
+            return "1"
+        return "0"
+
+    def _removeEntities(self, args, body):
+        type = int(args[0]) if args else -1
+        return self._remove([id for id, t in self.entities.items() if type == -1 or t == type])
+
+    def _remove(self, ids):
+        for id in ids:
+            del self.entities[id]
+            del self.positions[id]
+            self.rotations.pop(id, None)
+        return str(len(ids))
+
+    def _near(self, id, args):
+        """Entities within distance of id, args are distance and type => [id]"""
+        distance = float(args[0]) if args else 10.0
+        type = int(args[1]) if len(args) > 1 else -1
+        centre = np.array(self._position(id))
+        return [e for e, t in sorted(self.entities.items())
+                if e != id and (type == -1 or t == type) and np.linalg.norm(centre - self.positions[e]) <= distance]
+
+    def _entityGetEntities(self, args, body):
+        return self._entityList(self._near(int(args[0]), args[1:]))
+
+    def _entityRemoveEntities(self, args, body):
+        return self._remove(self._near(int(args[0]), args[1:]))
+
+    def _playerGetEntities(self, args, body):
+        return self._entityList(self._near(self._hostId(), args))
+
+    def _playerRemoveEntities(self, args, body):
+        return self._remove(self._near(self._hostId(), args))
+
+    def _position(self, id):
+        if id not in self.positions:
+            raise KeyError(id)
+        return self.positions[id]
+
+    def _hostId(self):
+        return next(iter(self.players.values()))
+
+    def _getPos(self, args, body):
+        return "%f,%f,%f" % tuple(self._position(int(args[0])))
+
+    def _setPos(self, args, body):
+        self._position(int(args[0]))[:] = _floats(args[1:4])
+
+    def _getTile(self, args, body):
+        return "%d,%d,%d" % tuple(int(np.floor(v)) for v in self._position(int(args[0])))
+
+    def _setTile(self, args, body):
+        self._position(int(args[0]))[:] = [float(v) for v in _ints(args[1:4])]
+
+    def _rotation(self, id):
+        self._position(id)
+        return self.rotations.setdefault(id, [0.0, 0.0])
+
+    def _getDirection(self, args, body):
+        # like Bukkit, yaw 0 faces +z and pitch 90 faces down
+        yaw, pitch = (math.radians(v) for v in self._rotation(int(args[0])))
+        return "%f,%f,%f" % (-math.sin(yaw) * math.cos(pitch), -math.sin(pitch), math.cos(yaw) * math.cos(pitch))
+
+    def _setDirection(self, args, body):
+        x, y, z = _floats(args[1:4])
+        rotation = self._rotation(int(args[0]))
+        if x or z:
+            rotation[0] = math.degrees(math.atan2(-x, z)) % 360.0
+        rotation[1] = math.degrees(math.atan2(-y, math.hypot(x, z)))
+
+    def _getRotation(self, args, body):
+        return "%f" % self._rotation(int(args[0]))[0]
+
+    def _setRotation(self, args, body):
+        self._rotation(int(args[0]))[0] = float(args[1])
+
+    def _getPitch(self, args, body):
+        return "%f" % self._rotation(int(args[0]))[1]
+
+    def _setPitch(self, args, body):
+        self._rotation(int(args[0]))[1] = float(args[1])
+
+    def _playerGetPos(self, args, body):
+        return self._getPos([self._hostId()], body)
+
+    def _playerSetPos(self, args, body):
+        self._setPos([self._hostId()] + args, body)
+
+    def _playerGetTile(self, args, body):
+        return self._getTile([self._hostId()], body)
+
+    def _playerSetTile(self, args, body):
+        self._setTile([self._hostId()] + args, body)
+
+    def _playerGetDirection(self, args, body):
+        return self._getDirection([self._hostId()], body)
+
+    def _playerSetDirection(self, args, body):
+        self._setDirection([self._hostId()] + args, body)
+
+    def _playerGetRotation(self, args, body):
+        return self._getRotation([self._hostId()], body)
+
+    def _playerSetRotation(self, args, body):
+        self._setRotation([self._hostId()] + args, body)
+
+    def _playerGetPitch(self, args, body):
+        return self._getPitch([self._hostId()], body)
+
+    def _playerSetPitch(self, args, body):
+        self._setPitch([self._hostId()] + args, body)
+
+    def _post(self, args, body):
+        self.chat.append(body)
+
+    def _noEvents(self, args, body):
+        return ""
+
+    def _ignore(self, args, body):
+        return None
+
+    def _checkpointSave(self, args, body):
+        self.checkpoint = dict((k, (c[0].copy(), c[1].copy())) for k, c in self.chunks.items())
+
+    def _checkpointRestore(self, args, body):
+        if self.checkpoint is not None:
+            self.chunks = dict((k, (c[0].copy(), c[1].copy())) for k, c in self.checkpoint.items())
+
+    HANDLERS = {
+        "world.setBlock": _setBlock,
+        "world.setBlocks": _setBlocks,
+        "world.getBlock": _getBlock,
+        "world.getBlockWithData": _getBlockWithData,
+        "world.getBlocks": _getBlocks,
+        "world.getHeight": _getHeight,
+        "world.getPlayerId": _getPlayerId,
+        "world.getPlayerIds": _getPlayerIds,
+        "world.getEntityTypes": _getEntityTypes,
+        "world.spawnEntity": _spawnEntity,
+        "world.getEntities": _getEntities,
+        "world.removeEntity": _removeEntity,
+        "world.removeEntities": _removeEntities,
+        "world.checkpoint.save": _checkpointSave,
+        "world.checkpoint.restore": _checkpointRestore,
+        "world.setting": _ignore,
+        "world.setSign": _ignore,
+        "chat.post": _post,
+        "entity.getName": _getName,
+        "entity.getPos": _getPos,
+        "entity.setPos": _setPos,
+        "entity.getTile": _getTile,
+        "entity.setTile": _setTile,
+        "entity.getDirection": _getDirection,
+        "entity.setDirection": _setDirection,
+        "entity.getRotation": _getRotation,
+        "entity.setRotation": _setRotation,
+        "entity.getPitch": _getPitch,
+        "entity.setPitch": _setPitch,
+        "entity.getEntities": _entityGetEntities,
+        "entity.removeEntities": _entityRemoveEntities,
+        "entity.setting": _ignore,
+        "entity.events.clear": _ignore,
+        "entity.events.block.hits": _noEvents,
+        "entity.events.chat.posts": _noEvents,
+        "entity.events.projectile.hits": _noEvents,
+        "player.getPos": _playerGetPos,
+        "player.setPos": _playerSetPos,
+        "player.getTile": _playerGetTile,
+        "player.setTile": _playerSetTile,
+        "player.getDirection": _playerGetDirection,
+        "player.setDirection": _playerSetDirection,
+        "player.getRotation": _playerGetRotation,
+        "player.setRotation": _playerSetRotation,
+        "player.getPitch": _playerGetPitch,
+        "player.setPitch": _playerSetPitch,
+        "player.getEntities": _playerGetEntities,
+        "player.removeEntities": _playerRemoveEntities,
+        "player.setting": _ignore,
+        "player.events.clear": _ignore,
+        "player.events.block.hits": _noEvents,
+        "player.events.chat.posts": _noEvents,
+        "player.events.projectile.hits": _noEvents,
+        "events.clear": _ignore,
+        "events.block.hits": _noEvents,
+        "events.chat.posts": _noEvents,
+        "events.projectile.hits": _noEvents,
+        "camera.mode.setNormal": _ignore,
+        "camera.mode.setFixed": _ignore,
+        "camera.mode.setFollow": _ignore,
+        "camera.setPos": _ignore,
+    }
+    # commands that change the world, the ones replay() sends
+    _WRITES = (_setBlock, _setBlocks, _setPos, _setTile, _setDirection, _setRotation, _setPitch,
+               _playerSetPos, _playerSetTile, _playerSetDirection, _playerSetRotation, _playerSetPitch,
+               _spawnEntity, _removeEntity, _removeEntities, _entityRemoveEntities, _playerRemoveEntities,
+               _checkpointSave, _checkpointRestore)
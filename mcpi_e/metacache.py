@@ -0,0 +1,176 @@
+import json
+import os
+import time
+from . import entity
+from .entity import Entity
+
+""" Cache for metadata that rarely changes
+
+    Player names and ids and the entity type table change maybe once a
+    minute, but scripts ask for them in every tick. MetaCache keeps them for
+    ttl seconds (settings.META_TTL unless given, typeTTL for the entity types) and answers from memory in
+    the meantime. Names and ids are kept in both directions, so learning
+    the id of a player also answers entity.getName for that id.
+
+    Every Minecraft has one in mc.meta. It is used by getPlayerEntityId,
+    getPlayerEntityIds, entity.getName and getEntityTypes when
+    settings.META_TTL is more than 0, the default 0 asks the server every
+    time like before. Call invalidate() when you know something changed,
+    e.g. a player joined.
+
+    The cache can be saved and loaded again. With settings.META_FILE,
+    Minecraft.create loads it before looking up the player and saves it
+    after, so a script restarted within the ttl does not ask again.
+
+    Example:
+        mc = Minecraft.create(server, 4711, name, Settings(META_TTL=60))
+        for id in mc.getPlayerEntityIds():     # one request per minute
+            print(mc.entity.getName(id))
+"""
+
+# the module level constants, so getEntityTypes returns the same objects
+_KNOWN = dict((e.id, e) for e in vars(entity).values() if isinstance(e, Entity))
+
+class MetaCache:
+    """Player names and ids and entity types, reused for ttl seconds"""
+    clock = staticmethod(time.time)
+
+    def __init__(self, conn, ttl=None, typeTTL=3600.0):
+        self.conn = conn
+        self.ttl = ttl
+        self.typeTTL = typeTTL
+        self.ids = {}       # name => (id, time)
+        self.names = {}     # id => (name, time)
+        self.playerIds = None
+        self.types = None
+        self.entities = dict(_KNOWN)
+        self.hits = 0
+        self.misses = 0
+
+    def _ttl(self):
+        return self.conn.settings.META_TTL if self.ttl is None else self.ttl
+
+    def _fresh(self, entry, ttl):
+        if entry is not None and self.clock() - entry[1] < ttl:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def _learn(self, name, id, now=None):
+        now = self.clock() if now is None else now
+        self.ids[name] = (id, now)
+        self.names[id] = (name, now)
+
+    def playerId(self, name):
+        """Entity id of the named player"""
+        entry = self.ids.get(name)
+        if self._fresh(entry, self._ttl()):
+            return entry[0]
+        id = int(self.conn.sendReceive(b"world.getPlayerId", name))
+        self._learn(name, id)
+        return id
+
+    def name(self, id):
+        """Name of a player or entity by id, the reply of entity.getName"""
+        id = int(id)
+        entry = self.names.get(id)
+        if self._fresh(entry, self._ttl()):
+            return entry[0]
+        name = self.conn.sendReceive(b"entity.getName", id)
+        # not the other direction, the id may be a mob and not a player
+        self.names[id] = (name, self.clock())
+        return name
+
+    def players(self):
+        """Entity ids of the connected players => [id:int]"""
+        if self._fresh(self.playerIds, self._ttl()):
+            return list(self.playerIds[0])
+        ids = list(map(int, self.conn.sendReceive(b"world.getPlayerIds").split("|")))
+        self.playerIds = (ids, self.clock())
+        return list(ids)
+
+    def entityTypes(self):
+        """All entity types => [Entity], one Entity object per type"""
+        if self._fresh(self.types, self.typeTTL):
+            return list(self.types[0])
+        s = self.conn.sendReceive(b"world.getEntityTypes")
+        pairs = [(int(t[:t.find(",")]), t[t.find(",") + 1:]) for t in s.split("|") if t]
+        self._setTypes(pairs)
+        return list(self.types[0])
+
+    def entityType(self, key):
+        """Entity type by id or name => Entity"""
+        for e in self.entityTypes():
+            if e.id == key or e.name == key:
+                return e
+        raise ValueError("unknown entity type {}".format(key))
+
+    def _setTypes(self, pairs, now=None):
+        types = []
+        for id, name in pairs:
+            e = self.entities.get(id)
+            if e is None or e.name != name:
+                e = self.entities[id] = Entity(id, name)
+            types.append(e)
+        self.types = (types, self.clock() if now is None else now)
+
+    def preload(self, players=None, entityTypes=None):
+        """Fill the cache without asking the server, players {name: id}, entityTypes [(id, name)] or [Entity]"""
+        now = self.clock()
+        for name, id in (players or {}).items():
+            self._learn(name, int(id), now)
+        if entityTypes is not None:
+            self._setTypes([(e.id, e.name) if isinstance(e, Entity) else (int(e[0]), e[1])
+                            for e in entityTypes], now)
+
+    def invalidate(self, what=None):
+        """Forget cached values: all, "players", "types", or one player by name or id"""
+        if what is None or what == "players":
+            self.ids.clear()
+            self.names.clear()
+            self.playerIds = None
+        if what is None or what == "types":
+            self.types = None
+        if isinstance(what, int):
+            name = self.names.pop(what, (None,))[0]
+            self.ids.pop(name, None)
+            self.playerIds = None
+        elif what not in (None, "players", "types"):
+            id = self.ids.pop(what, (None,))[0]
+            self.names.pop(id, None)
+            self.playerIds = None
+
+    def save(self, path):
+        """Write the cached values to a JSON file"""
+        state = {"version": 1,
+                 "players": [[name, id, t] for name, (id, t) in self.ids.items()],
+                 "names": [[id, name, t] for id, (name, t) in self.names.items()],
+                 "playerIds": self.playerIds,
+                 "types": [[[e.id, e.name] for e in self.types[0]], self.types[1]] if self.types else None}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Read values written by save() => True if the file was read
+
+        The values keep the time they were asked for, so they expire as if
+        the script had not stopped."""
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (IOError, OSError, ValueError):
+            return False
+        if state.get("version") != 1:
+            return False
+        for name, id, t in state["players"]:
+            self.ids[name] = (id, t)
+        for id, name, t in state["names"]:
+            self.names[id] = (name, t)
+        if state["playerIds"]:
+            self.playerIds = tuple(state["playerIds"])
+        if state["types"]:
+            self._setTypes(state["types"][0], state["types"][1])
+        return True
@@ -1,13 +1,13 @@
-from .connection import Connection
+from .connection import Connection, RequestError
 from .vec3 import Vec3
 from .event import BlockEvent, ChatEvent, ProjectileEvent
 from .entity import Entity
-from .block import Block
+from .block import lookup
 import math
 from .util import flatten
 import sys
 from .logger import *
-import mcpi_e.settings as settings
+from .metacache import MetaCache
 
 
 """ Minecraft PI low level api v0.1_1
@@ -101,6 +101,8 @@ class CmdEntity(CmdPositioner):
         """Get the list name of the player with entity id => [name:str]
         
         Also can be used to find name of entity if entity is not a player."""
+        if self.conn.settings.META_TTL > 0:
+            return self.conn.meta.name(id)
         return self.conn.sendReceive(b"entity.getName", id)
 
     def getEntities(self, id, distance=10, typeId=-1):
@@ -298,7 +300,10 @@ class Minecraft:
         self.player=CmdPlayerEntity(connection,playerId)
         self.events = CmdEvents(connection)
         self.playerId= playerId
-        self.settings=settings
+        self.settings=connection.settings
+        if connection.meta is None:
+            connection.meta = MetaCache(connection)
+        self.meta = connection.meta
 
     def getBlock(self, *args):
         """Get block (x,y,z) => id:int"""
@@ -307,13 +312,35 @@ class Minecraft:
     def getBlockWithData(self, *args):
         """Get block with data (x,y,z) => Block"""
         ans = self.conn.sendReceive(b"world.getBlockWithData", intFloor(args))
-        return Block(*list(map(int, ans.split(","))))
+        id, data = ans.split(",")
+        return lookup(int(id), int(data))
 
     def getBlocks(self, *args):
         """Get a cuboid of blocks (x0,y0,z0,x1,y1,z1) => [id:int]"""
         s = self.conn.sendReceive(b"world.getBlocks", intFloor(args))
         return map(int, s.split(","))
 
+    def scanRegion(self, *args, **kwargs):
+        """Read a cuboid in tiles (x0,y0,z0,x1,y1,z1, tileSize=32, readAhead=4) => generator of (Vec3, [x,y,z] id array)
+
+        Needs numpy, see mcpi_e.scan"""
+        from .scan import scanRegion
+        return scanRegion(self, *intFloor(args), **kwargs)
+
+    def copyRegion(self, *args, **kwargs):
+        """Copy a cuboid to a new min corner (x0,y0,z0,x1,y1,z1,dx,dy,dz, rotate=0, mirror=None, replace=None) => commands sent
+
+        Needs numpy, see mcpi_e.region"""
+        from .region import copyRegion
+        return copyRegion(self, *intFloor(args), **kwargs)
+
+    def moveRegion(self, *args, **kwargs):
+        """Move a cuboid to a new min corner (x0,y0,z0,x1,y1,z1,dx,dy,dz, rotate=0, mirror=None, replace=None) => commands sent
+
+        Needs numpy, see mcpi_e.region"""
+        from .region import moveRegion
+        return moveRegion(self, *intFloor(args), **kwargs)
+
     def setBlock(self, *args):
         """Set block (x,y,z,id,[data])"""
         self.conn.send(b"world.setBlock", intFloor(args))
@@ -322,6 +349,10 @@ class Minecraft:
         """Set a cuboid of blocks (x0,y0,z0,x1,y1,z1,id,[data])"""
         self.conn.send(b"world.setBlocks", intFloor(args))
 
+    def flush(self):
+        """Send the setBlock writes held back by settings.COMBINE_WRITES"""
+        self.conn.flush()
+
     def setSign(self, *args):
         """Set a sign (x,y,z,id,data,[line1,line2,line3,line4])
         
@@ -340,17 +371,51 @@ class Minecraft:
         """Spawn entity (x,y,z,id)"""
         return int(self.conn.sendReceive(b"world.spawnEntity", args))
 
+    def spawnEntities(self, positions, entityType, window=500):
+        """Spawn entities at many positions ([(x,y,z)], entityType or [entityType]) => [id:int or RequestError]
+
+        The commands are sent window at a time in one write each, so a wave
+        reaches the server together. A spawn that fails gives a RequestError
+        in its place in the list instead of raising."""
+        positions = [list(flatten([p])) for p in positions]
+        if isinstance(entityType, (list, tuple)):
+            types = [list(flatten([t])) for t in entityType]
+            if len(types) != len(positions):
+                raise ValueError("{} entity types for {} positions".format(len(types), len(positions)))
+        else:
+            types = [list(flatten([entityType]))] * len(positions)
+        return self._batch(b"world.spawnEntity", [p + t for p, t in zip(positions, types)], window)
+
+    def removeEntitiesById(self, ids, window=500):
+        """Remove entities by id ([entityId:int]) => [removedEntitiesCount:int or RequestError]"""
+        return self._batch(b"world.removeEntity", [[int(id)] for id in ids], window)
+
+    def _batch(self, f, argsList, window):
+        results = []
+        for i in range(0, len(argsList), window):
+            part = argsList[i:i + window]
+            for args, s in zip(part, self.conn.sendReceiveBatch(f, part)):
+                if s == Connection.RequestFailed:
+                    results.append(RequestError("%s(%s) failed"%(f.decode("utf-8"), ",".join(map(str, args)))))
+                else:
+                    results.append(int(s))
+        return results
+
     def getHeight(self, *args):
         """Get the height of the world (x,z) => int"""
         return int(self.conn.sendReceive(b"world.getHeight", intFloor(args)))
 
     def getPlayerEntityIds(self):
         """Get the entity ids of the connected players => [id:int]"""
+        if self.settings.META_TTL > 0:
+            return self.meta.players()
         ids = self.conn.sendReceive(b"world.getPlayerIds")
         return list(map(int, ids.split("|")))
 
     def getPlayerEntityId(self, name):
         """Get the entity id of the named player => [id:int]"""
+        if self.settings.META_TTL > 0:
+            return self.meta.playerId(name)
         return int(self.conn.sendReceive(b"world.getPlayerId", name))
 
     def saveCheckpoint(self):
@@ -371,6 +436,8 @@ class Minecraft:
 
     def getEntityTypes(self):
         """Return a list of Entity objects representing all the entity types in Minecraft"""  
+        if self.settings.META_TTL > 0:
+            return self.meta.entityTypes()
         s = self.conn.sendReceive(b"world.getEntityTypes")
         types = [t for t in s.split("|") if t]
         return [Entity(int(e[:e.find(",")]), e[e.find(",") + 1:]) for e in types]
@@ -391,13 +458,27 @@ class Minecraft:
 
 
     @staticmethod
-    def create(address = "localhost", port = 4711,playerName=""):
-        log("Running Python version:"+sys.version)
-        conn=Connection(address, port)
+    def create(address = "localhost", port = 4711,playerName="",settings=None,transport=None):
+        """Connect to a server, settings is an optional Settings for this instance
+
+        address "unix:/path" connects over a Unix domain socket, transport
+        replaces the socket altogether, e.g. MemoryWorld().transport()"""
+        conn=Connection(address, port, settings, transport)
+        if conn.settings.NEGOTIATE:
+            conn.negotiate()
+        log("Running Python version:"+sys.version, settings=conn.settings)
+        conn.meta = MetaCache(conn)
+        if conn.settings.META_FILE:
+            conn.meta.load(conn.settings.META_FILE)
         playerId=[]
         if playerName!="":
-           playerId= int(conn.sendReceive(b"world.getPlayerId", playerName))
-           log("get {} playerid={}".format(playerName, playerId))
+           if conn.settings.META_TTL > 0:
+               playerId= conn.meta.playerId(playerName)
+           else:
+               playerId= int(conn.sendReceive(b"world.getPlayerId", playerName))
+           log("get {} playerid={}".format(playerName, playerId), settings=conn.settings)
+        if conn.settings.META_FILE:
+            conn.meta.save(conn.settings.META_FILE)
 
         return Minecraft(conn,playerId)
     
@@ -0,0 +1,207 @@
+import numpy as np
+from . import block
+from .scan import scanTiles
+from .vec3 import Vec3
+
+""" Top-down maps
+
+    A Minimap is an RGB image of a region seen from above, one pixel per
+    column, north (-z) up. Each column shows the colour of its highest
+    non-air block, shaded by height and by the slope to the north like the
+    maps in the game.
+
+    The map is read with world.getBlocks in tiles of tileSize x slab x
+    tileSize blocks, starting from the top of the region and going down only
+    for the columns whose surface was not found yet, so a 1024x1024 map
+    does not read much more than the few slabs around the ground.
+
+    Later, only tiles marked with markDirty() (e.g. from block hit events
+    or a RegionWatcher) are read and drawn again by update().
+
+    Example:
+        m = Minimap(mc, -512, -512, 511, 511, y0=0, y1=127)
+        m.update()
+        m.save("map.ppm")
+        ...
+        m.markDirty(x, z)
+        m.update()
+"""
+
+COLORS = {
+    block.STONE.id: (125, 125, 125),
+    block.GRASS.id: (95, 159, 53),
+    block.DIRT.id: (134, 96, 67),
+    block.COBBLESTONE.id: (110, 110, 110),
+    block.WOOD_PLANKS.id: (157, 128, 79),
+    block.BEDROCK.id: (60, 60, 60),
+    block.WATER_FLOWING.id: (47, 67, 244),
+    block.WATER_STATIONARY.id: (47, 67, 244),
+    block.LAVA_FLOWING.id: (207, 92, 20),
+    block.LAVA_STATIONARY.id: (207, 92, 20),
+    block.SAND.id: (219, 211, 160),
+    block.GRAVEL.id: (136, 126, 126),
+    block.WOOD.id: (102, 81, 51),
+    block.LEAVES.id: (60, 120, 40),
+    block.LEAVES2.id: (60, 120, 40),
+    block.GLASS.id: (200, 220, 230),
+    block.SANDSTONE.id: (216, 203, 155),
+    block.WOOL.id: (222, 222, 222),
+    block.GOLD_BLOCK.id: (249, 236, 79),
+    block.IRON_BLOCK.id: (219, 219, 219),
+    block.STONE_SLAB_DOUBLE.id: (160, 160, 160),
+    block.STONE_SLAB.id: (160, 160, 160),
+    block.BRICK_BLOCK.id: (150, 97, 83),
+    block.TNT.id: (219, 68, 26),
+    block.MOSS_STONE.id: (90, 108, 90),
+    block.OBSIDIAN.id: (20, 18, 29),
+    block.DIAMOND_BLOCK.id: (98, 219, 214),
+    block.FARMLAND.id: (115, 75, 45),
+    block.SNOW.id: (240, 251, 251),
+    block.SNOW_BLOCK.id: (240, 251, 251),
+    block.ICE.id: (160, 190, 250),
+    block.CACTUS.id: (13, 99, 24),
+    block.CLAY.id: (159, 164, 177),
+    block.PUMPKIN.id: (192, 118, 21),
+    block.NETHERRACK.id: (111, 54, 52),
+    block.GLOWSTONE_BLOCK.id: (249, 212, 156),
+    block.STAINED_GLASS.id: (180, 180, 200),
+    block.STONE_BRICK.id: (122, 121, 122),
+    block.MELON.id: (141, 145, 36),
+    block.MYCELIUM.id: (111, 99, 105),
+    block.NETHER_BRICK.id: (44, 21, 26),
+    block.END_STONE.id: (221, 223, 165),
+}
+
+UNKNOWN = (200, 0, 200)
+VOID = (0, 0, 0)
+
+def colorTable(colors=None, unknown=UNKNOWN):
+    """Lookup table id => RGB, an array of shape (block.MAX_ID, 3)"""
+    table = np.empty((block.MAX_ID, 3), dtype=np.float32)
+    table[:] = unknown
+    for ident, rgb in (COLORS if colors is None else colors).items():
+        table[ident] = rgb
+    return table
+
+def surface(ids, y0=0):
+    """Highest non-air block of every column of an [x, y, z] array => (ids [x, z], heights [x, z])
+
+    Columns that are all air get id 0 and height y0 - 1."""
+    ids = np.asarray(ids)
+    solid = ids[:, ::-1, :] != 0
+    found = solid.any(axis=1)
+    fromTop = solid.argmax(axis=1)
+    index = ids.shape[1] - 1 - fromTop
+    top = np.take_along_axis(ids, index[:, None, :], axis=1)[:, 0, :]
+    return np.where(found, top, 0), np.where(found, y0 + index, y0 - 1)
+
+def shade(tops, heights, north, table, y0=0, y1=127):
+    """RGB of columns => uint8 array [x, z, 3]
+
+    north holds the heights of the columns one step to the north (-z)."""
+    rgb = table[np.clip(tops, 0, len(table) - 1)]
+    span = max(1, y1 - y0)
+    # higher is lighter, and slopes facing north are lighter still
+    light = 0.75 + 0.35 * (heights - y0) / span
+    light = light + 0.12 * np.clip(heights - north, -1, 1)
+    rgb = rgb * np.clip(light, 0.3, 1.3)[..., None]
+    rgb[heights < y0] = VOID
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+class Minimap:
+    """Top-down image of the region x0..x1, z0..z1, looking for the surface between y0 and y1"""
+    def __init__(self, mc, x0, z0, x1, z1, y0=0, y1=127, tileSize=64, slab=16, colors=None, readAhead=4):
+        self.mc = mc
+        self.x0, self.x1 = min(x0, x1), max(x0, x1)
+        self.z0, self.z1 = min(z0, z1), max(z0, z1)
+        self.y0, self.y1 = min(y0, y1), max(y0, y1)
+        self.tileSize = tileSize
+        self.slab = slab
+        self.readAhead = readAhead
+        self.table = colorTable(colors)
+        nx, nz = self.x1 - self.x0 + 1, self.z1 - self.z0 + 1
+        self.tops = np.zeros((nx, nz), dtype=np.int32)
+        self.heights = np.full((nx, nz), self.y0 - 1, dtype=np.int32)
+        self.pixels = np.zeros((nx, nz, 3), dtype=np.uint8)
+        self.dirty = set((tx, tz) for tx in range(0, nx, tileSize) for tz in range(0, nz, tileSize))
+        self.drawn = set()
+        self.reads = 0
+
+    @property
+    def image(self):
+        """The map as an image array (height, width, 3), north up"""
+        return self.pixels.transpose(1, 0, 2)
+
+    def markDirty(self, x, z, x1=None, z1=None):
+        """Draw the tiles of the column x, z (or the area x..x1, z..z1) again on the next update()"""
+        x1 = x if x1 is None else x1
+        z1 = z if z1 is None else z1
+        t = self.tileSize
+        lx = max(min(x, x1), self.x0) - self.x0
+        hx = min(max(x, x1), self.x1) - self.x0
+        lz = max(min(z, z1), self.z0) - self.z0
+        hz = min(max(z, z1), self.z1) - self.z0
+        for tx in range(lx // t * t, hx + 1, t):
+            for tz in range(lz // t * t, hz + 1, t):
+                self.dirty.add((tx, tz))
+
+    def update(self):
+        """Read and draw the dirty tiles => list of (x, z) world corners of the tiles that changed"""
+        dirty, self.dirty = sorted(self.dirty), set()
+        if not dirty:
+            return []
+        nx, nz = self.tops.shape
+        t = self.tileSize
+        tops, heights = {}, {}
+        for tx, tz in dirty:
+            shape = (min(t, nx - tx), min(t, nz - tz))
+            tops[(tx, tz)] = np.zeros(shape, dtype=np.int32)
+            heights[(tx, tz)] = np.full(shape, self.y0 - 1, dtype=np.int32)
+        # slabs from the top down, only for tiles with columns still open
+        pending = list(dirty)
+        top = self.y1
+        while pending and top >= self.y0:
+            bottom = max(self.y0, top - self.slab + 1)
+            boxes = [(Vec3(self.x0 + tx, bottom, self.z0 + tz), (tops[(tx, tz)].shape[0], top - bottom + 1, tops[(tx, tz)].shape[1]))
+                     for tx, tz in pending]
+            still = []
+            for (tx, tz), (origin, ids) in zip(pending, scanTiles(self.mc, boxes, self.readAhead)):
+                self.reads += 1
+                ident, height = surface(ids, bottom)
+                missing = heights[(tx, tz)] < self.y0
+                found = missing & (height >= bottom)
+                tops[(tx, tz)][found] = ident[found]
+                heights[(tx, tz)][found] = height[found]
+                if (missing & ~found).any():
+                    still.append((tx, tz))
+            pending = still
+            top = bottom - 1
+        changed = []
+        for tx, tz in dirty:
+            sx, sz = tops[(tx, tz)].shape
+            old = (self.tops[tx:tx + sx, tz:tz + sz], self.heights[tx:tx + sx, tz:tz + sz])
+            if (tx, tz) in self.drawn and (old[0] == tops[(tx, tz)]).all() and (old[1] == heights[(tx, tz)]).all():
+                continue
+            self.tops[tx:tx + sx, tz:tz + sz] = tops[(tx, tz)]
+            self.heights[tx:tx + sx, tz:tz + sz] = heights[(tx, tz)]
+            # the row south of the tile is shaded by the heights of this one
+            self.render(tx, tz, sx, min(sz + 1, nz - tz))
+            self.drawn.add((tx, tz))
+            changed.append((self.x0 + tx, self.z0 + tz))
+        return changed
+
+    def render(self, tx, tz, sx, sz):
+        """Draw columns tx..tx+sx-1, tz..tz+sz-1 (map coordinates) from the stored heights"""
+        heights = self.heights[tx:tx + sx, tz:tz + sz]
+        north = self.heights[tx:tx + sx, max(tz - 1, 0):tz + sz - 1]
+        if tz == 0:
+            north = np.concatenate([heights[:, :1], north], axis=1)
+        self.pixels[tx:tx + sx, tz:tz + sz] = shade(self.tops[tx:tx + sx, tz:tz + sz], heights, north,
+                                                    self.table, self.y0, self.y1)
+
+    def save(self, path):
+        """Write the map as a binary PPM image, readable by most image tools"""
+        image = np.ascontiguousarray(self.image)
+        with open(path, "wb") as f:
+            f.write(b"P6 %d %d 255\n" % (image.shape[1], image.shape[0]))
+            f.write(image.tobytes())
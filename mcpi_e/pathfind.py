@@ -0,0 +1,154 @@
+import heapq
+import math
+import time
+import numpy as np
+from . import block
+from .vec3 import Vec3
+
+""" Path finding on scanned blocks
+
+    A Pathfinder works on an [x, y, z] id array (from Minecraft.scanRegion,
+    Snapshot.region, ...) so planning a route needs no round trips. A
+    position is walkable when the block below is solid and the feet and head
+    blocks can be walked through. Water, lava, fire and cobwebs are avoided
+    as both floor and air.
+
+    Example:
+        finder = Pathfinder.scan(mc, x - 100, y - 10, z - 100, x + 100, y + 10, z + 100)
+        path = finder.findPath(mc.player.getTilePos(), Vec3(x + 80, y, z + 60))
+        if path:
+            walkPath(mc.player, path, speed=5)
+"""
+
+PASSABLE = [block.AIR, block.SAPLING, block.GRASS_TALL, block.DEAD_BUSH,
+            block.FLOWER_YELLOW, block.FLOWER_CYAN, block.MUSHROOM_BROWN,
+            block.MUSHROOM_RED, block.TORCH, block.RAIL, block.RAIL_POWERED,
+            block.RAIL_DETECTOR, block.RAIL_ACTIVATOR, block.SIGN_STANDING,
+            block.SIGN_WALL, block.TORCH_REDSTONE, block.SNOW, block.SUGAR_CANE,
+            block.LADDER]
+
+AVOID = [block.WATER_FLOWING, block.WATER_STATIONARY, block.LAVA_FLOWING,
+         block.LAVA_STATIONARY, block.FIRE, block.COBWEB, block.CACTUS]
+
+_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+class Pathfinder:
+    """A* over a local block array, positions are world coordinates"""
+    def __init__(self, ids, origin=(0, 0, 0), maxJump=1, maxDrop=3, passable=PASSABLE, avoid=AVOID):
+        ids = np.asarray(ids)
+        if ids.ndim != 3:
+            raise ValueError("expected a 3d array indexed [x, y, z]")
+        self.origin = tuple(int(v) for v in origin)
+        self.shape = ids.shape
+        self.maxJump = maxJump
+        self.maxDrop = maxDrop
+        bad = np.isin(ids, [b.id for b in avoid])
+        clear = np.isin(ids, [b.id for b in passable]) & ~bad
+        solid = ~clear & ~bad
+        # the space above the scanned array counts as air
+        clear = np.concatenate([clear, np.ones(ids.shape[:1] + (2,) + ids.shape[2:], dtype=bool)], axis=1)
+        self.clear = clear
+        stand = np.zeros(ids.shape, dtype=bool)
+        stand[:, 1:, :] = solid[:, :-1, :] & clear[:, 1:-2, :] & clear[:, 2:-1, :]
+        self.stand = stand
+
+    @staticmethod
+    def scan(mc, x0, y0, z0, x1, y1, z1, **kwargs):
+        """Read a cuboid from the world and build a Pathfinder for it"""
+        from .scan import readRegion
+        lo, ids = readRegion(mc, x0, y0, z0, x1, y1, z1)
+        return Pathfinder(ids, lo, **kwargs)
+
+    def _local(self, pos):
+        # floor, so float positions like the ones of getPos find their cell below zero too
+        x, y, z = (int(math.floor(v)) for v in pos)
+        return x - self.origin[0], y - self.origin[1], z - self.origin[2]
+
+    def _inside(self, x, y, z):
+        return 0 <= x < self.shape[0] and 0 <= y < self.shape[1] and 0 <= z < self.shape[2]
+
+    def walkable(self, *pos):
+        """Can an entity stand at (x,y,z)"""
+        x, y, z = self._local(pos[0] if len(pos) == 1 else pos)
+        return self._inside(x, y, z) and bool(self.stand[x, y, z])
+
+    def _neighbours(self, x, y, z):
+        stand, clear = self.stand, self.clear
+        nx_, ny_, nz_ = self.shape
+        for dx, dz in _STEPS:
+            cx, cz = x + dx, z + dz
+            if not (0 <= cx < nx_ and 0 <= cz < nz_):
+                continue
+            # jumping up needs headroom above the start
+            for up in range(0, self.maxJump + 1):
+                ty = y + up
+                if ty >= ny_ or (up and not clear[x, y + 1 + up, z]):
+                    break
+                if stand[cx, ty, cz]:
+                    yield cx, ty, cz, 1 + up
+                    break
+            # dropping down needs the column to be clear down to the landing
+            if not clear[cx, y + 1, cz]:
+                continue
+            for down in range(1, self.maxDrop + 1):
+                ty = y - down
+                if ty < 0 or not clear[cx, ty + 1, cz]:
+                    break
+                if stand[cx, ty, cz]:
+                    yield cx, ty, cz, 1 + down * 0.5
+                    break
+
+    def findPath(self, start, goal, maxNodes=20000):
+        """Shortest walk from start to goal => [Vec3] including both ends, None when there is none
+
+        The search gives up after expanding maxNodes positions."""
+        s, g = self._local(start), self._local(goal)
+        if not (self._inside(*s) and self._inside(*g)) or not (self.stand[s] and self.stand[g]):
+            return None
+        # every step moves one block sideways, so this never overestimates
+        def h(p):
+            return abs(p[0] - g[0]) + abs(p[2] - g[2])
+        openList = [(h(s), 0, s)]
+        came = {s: None}
+        cost = {s: 0}
+        expanded = 0
+        while openList:
+            _, c, p = heapq.heappop(openList)
+            if p == g:
+                return self._route(came, g)
+            if c > cost[p]:
+                continue
+            expanded += 1
+            if expanded > maxNodes:
+                return None
+            for x, y, z, step in self._neighbours(*p):
+                n = (x, y, z)
+                nc = c + step
+                if nc < cost.get(n, float("inf")):
+                    cost[n] = nc
+                    came[n] = p
+                    heapq.heappush(openList, (nc + h(n), nc, n))
+        return None
+
+    def _route(self, came, p):
+        ox, oy, oz = self.origin
+        path = []
+        while p is not None:
+            path.append(Vec3(p[0] + ox, p[1] + oy, p[2] + oz))
+            p = came[p]
+        path.reverse()
+        return path
+
+def walkPath(positioner, path, speed=4.0, id=None):
+    """Move an entity along a path at speed blocks per second with setPos
+
+    positioner is mc.player or mc.entity, the latter needs the entity id."""
+    delay = 1.0 / speed if speed > 0 else 0
+    for p in path:
+        pos = (p.x + 0.5, p.y, p.z + 0.5)
+        if id is None:
+            positioner.setPos(*pos)
+        else:
+            positioner.setPos(id, *pos)
+        if delay:
+            time.sleep(delay)
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from . import voxel
+
+""" Procedural builds on several cores
+
+    buildSections runs a generator function for every section of a build in
+    a pool of worker processes. Each worker turns its section into an
+    [x, y, z] id array and merges it into setBlocks boxes, only the compact
+    box array travels back. The calling process sends the boxes of each
+    section as soon as it arrives, so computing and sending overlap, and at
+    most maxPending sections are queued or waiting to be sent.
+
+    The generator must be a module level function (it is pickled) that
+    takes one section and returns (origin, ids) or (origin, ids, data).
+    Cells with the value skip are left alone.
+
+    Example:
+        def tower(section):
+            x, z = section
+            ids = np.zeros((16, 64, 16), dtype=np.int32)
+            ids[4:12, :, 4:12] = block.STONE.id
+            return (x * 16, 0, z * 16), ids
+
+        if __name__ == "__main__":
+            buildSections(mc, tower, [(x, z) for x in range(8) for z in range(8)])
+"""
+
+def _runSection(generator, section, skip, span):
+    result = generator(section)
+    origin, ids = result[0], result[1]
+    data = result[2] if len(result) > 2 else None
+    rows = voxel.boxes(ids, data, skip=skip, span=span)
+    # box coordinates fit in 32 bits and halve the bytes sent between processes
+    return tuple(int(v) for v in origin), rows.astype(np.int32)
+
+def buildSections(mc, generator, sections, processes=None, maxPending=None, skip=-1):
+    """Generate sections in worker processes and send them as they finish => number of commands"""
+    span = voxel.spanFor(mc.settings)
+    sections = iter(sections)
+    count = 0
+    processes = processes or os.cpu_count() or 1
+    limit = maxPending or 2 * processes
+    with ProcessPoolExecutor(processes) as pool:
+        running = set()
+        while True:
+            for section in sections:
+                running.add(pool.submit(_runSection, generator, section, skip, span))
+                if len(running) >= limit:
+                    break
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                origin, rows = future.result()
+                count += voxel.writeBoxes(mc, rows, origin)
+    return count
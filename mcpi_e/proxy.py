@@ -0,0 +1,118 @@
+import socket
+import struct
+import sys
+import threading
+from .connection import Connection
+from .settings import Settings
+from .logger import *
+from .util import expectsReply
+
+""" Reference proxy for the binary batch protocol
+
+    Runs next to a plain RaspberryJuice server and speaks the binary batch
+    protocol to clients, so only the proxy to server hop uses the verbose
+    text protocol. Run it on the server machine:
+
+        python -m mcpi_e.proxy 4712 localhost 4711
+
+    and connect with Minecraft.create(host, 4712, name, Settings(NEGOTIATE=True)).
+
+    Protocol extensions, all other commands are passed through unchanged:
+        mcpie.capabilities()      => "binary"
+        mcpie.setBlocks(n,ox,oy,oz)
+                                  followed by n rows of 8 little endian int16
+                                  (x0,y0,z0,x1,y1,z1,id,data), coordinates
+                                  relative to ox,oy,oz, no reply
+        mcpie.getBlocks(x0,y0,z0,x1,y1,z1)
+                                  => a line with the byte count, then one
+                                  little endian uint16 per block in the
+                                  order of world.getBlocks
+"""
+
+CAPABILITIES = "binary"
+_ROW = struct.Struct("<8h")
+
+class ProxySession:
+    """One client and its own connection to the server"""
+    def __init__(self, client, address, port):
+        self.client = client
+        self.input = client.makefile("rb")
+        self.server = Connection(address, port, Settings(SYS_SPEED=0, SHOW_DEBUG=False, SHOW_Log=False))
+
+    def reply(self, data):
+        self.client.sendall(data)
+
+    def run(self):
+        try:
+            for line in self.input:
+                self.handle(line)
+        except socket.error as e:
+            warn("proxy session closed: {}".format(e))
+        finally:
+            self.server.close()
+            self.client.close()
+
+    def handle(self, line):
+        name = line[:line.find(b"(")].decode("utf-8", "replace")
+        if name == "mcpie.capabilities":
+            self.reply(CAPABILITIES.encode("UTF-8") + b"\n")
+        elif name == "mcpie.setBlocks":
+            args = line[line.find(b"(") + 1:line.rfind(b")")].split(b",")
+            count, ox, oy, oz = (int(v) for v in args)
+            payload = self.input.read(count * _ROW.size)
+            if len(payload) < count * _ROW.size:
+                raise socket.error("client closed in the middle of a batch")
+            self.setBlocks(payload, ox, oy, oz)
+        elif name == "mcpie.getBlocks":
+            args = line[line.find(b"(") + 1:line.rfind(b")")]
+            s = self.forward(b"world.getBlocks(" + args + b")\n")
+            if s == Connection.RequestFailed:
+                self.reply(b"Fail\n")
+            else:
+                values = [int(v) for v in s.split(",") if v]
+                data = struct.pack("<%dH" % len(values), *values)
+                self.reply(str(len(data)).encode("UTF-8") + b"\n" + data)
+        elif expectsReply(name):
+            self.reply(self.forward(line).encode("utf-8") + b"\n")
+        else:
+            self.server._send(line)
+
+    def forward(self, line):
+        """Send a text command to the server and wait for its reply line"""
+        self.server._send(line)
+        return self.server._readline()
+
+    def setBlocks(self, payload, ox, oy, oz):
+        lines = []
+        for x0, y0, z0, x1, y1, z1, ident, data in _ROW.iter_unpack(payload):
+            x0, y0, z0, x1, y1, z1 = x0 + ox, y0 + oy, z0 + oz, x1 + ox, y1 + oy, z1 + oz
+            if x0 == x1 and y0 == y1 and z0 == z1:
+                lines.append(b"world.setBlock(%d,%d,%d,%d,%d)\n" % (x0, y0, z0, ident, data))
+            else:
+                lines.append(b"world.setBlocks(%d,%d,%d,%d,%d,%d,%d,%d)\n" % (x0, y0, z0, x1, y1, z1, ident, data))
+        if lines:
+            self.server._send(b"".join(lines))
+
+def serve(listenPort, address="localhost", port=4711, host="", settings=None):
+    """Accept clients on listenPort and relay them to the server at address:port
+
+    settings only controls the log output of the proxy itself."""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, listenPort))
+    listener.listen(5)
+    log("proxy on port {} for {}:{}".format(listenPort, address, port), settings=settings)
+    while True:
+        client, _ = listener.accept()
+        session = ProxySession(client, address, port)
+        thread = threading.Thread(target=session.run)
+        thread.daemon = True
+        thread.start()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python -m mcpi_e.proxy listenPort [serverAddress] [serverPort]")
+        sys.exit(1)
+    serve(int(sys.argv[1]),
+          sys.argv[2] if len(sys.argv) > 2 else "localhost",
+          int(sys.argv[3]) if len(sys.argv) > 3 else 4711)
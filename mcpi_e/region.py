@@ -0,0 +1,60 @@
+import numpy as np
+from . import voxel
+from .scan import readRegion, readData
+
+""" Copying and moving structures
+
+    A region is read with one tiled getBlocks scan, transformed with NumPy
+    (rotation, mirroring, block replacement) and written back as merged
+    setBlocks boxes. world.getBlocks only returns ids; pass withData=True
+    to also read data values (colours, facing), which costs one pipelined
+    getBlockWithData per non-air block. Data values are copied as they are
+    and are not turned with the structure.
+"""
+
+def _transform(ids, data, rotate, mirror, replace):
+    if replace:
+        ids, data = voxel.replace(ids, data, replace)
+    if mirror:
+        ids, data = voxel.mirror(ids, mirror), voxel.mirror(data, mirror)
+    if rotate:
+        if rotate % 90:
+            raise ValueError("rotate must be a multiple of 90")
+        ids, data = voxel.rotate(ids, rotate // 90), voxel.rotate(data, rotate // 90)
+    return ids, data
+
+def copyRegion(mc, x0, y0, z0, x1, y1, z1, dx, dy, dz, rotate=0, mirror=None, replace=None,
+               skipAir=False, withData=False):
+    """Copy a cuboid so its min corner lands on (dx,dy,dz) => number of commands sent
+
+    rotate turns the copy around y in degrees, 90 moves (x, z) to (-z, x)
+    like Vec3.rotateRight. mirror is "x", "z" or "xz", replace maps blocks
+    to other blocks. Mirroring happens before rotating."""
+    lo, ids = readRegion(mc, x0, y0, z0, x1, y1, z1)
+    data = readData(mc, lo, ids) if withData else np.zeros_like(ids)
+    ids, data = _transform(ids, data, rotate, mirror, replace)
+    if skipAir:
+        ids = np.where(ids == 0, -1, ids)
+    rows = voxel.boxes(ids, data, skip=-1, span=voxel.spanFor(mc.settings))
+    return voxel.writeBoxes(mc, rows, (dx, dy, dz))
+
+def moveRegion(mc, x0, y0, z0, x1, y1, z1, dx, dy, dz, rotate=0, mirror=None, replace=None,
+               withData=False, fill=0):
+    """Move a cuboid so its min corner lands on (dx,dy,dz), the old place is filled with air => number of commands sent
+
+    The source is read completely before anything is written, and only the
+    part of the source that the copy does not cover is cleared, so source
+    and destination may overlap."""
+    lo, ids = readRegion(mc, x0, y0, z0, x1, y1, z1)
+    data = readData(mc, lo, ids) if withData else np.zeros_like(ids)
+    ids, data = _transform(ids, data, rotate, mirror, replace)
+    span = voxel.spanFor(mc.settings)
+    # clear the source cells outside the destination box first
+    clear = np.full((abs(x1 - x0) + 1, abs(y1 - y0) + 1, abs(z1 - z0) + 1), fill, dtype=np.int32)
+    a = np.maximum([dx - lo.x, dy - lo.y, dz - lo.z], 0)
+    b = np.minimum(np.array([dx - lo.x, dy - lo.y, dz - lo.z]) + ids.shape, clear.shape)
+    if (a < b).all():
+        clear[a[0]:b[0], a[1]:b[1], a[2]:b[2]] = -1
+    count = voxel.writeBoxes(mc, voxel.boxes(clear, skip=-1, span=span), lo)
+    rows = voxel.boxes(ids, data, skip=-1, span=span)
+    return count + voxel.writeBoxes(mc, rows, (dx, dy, dz))
@@ -0,0 +1,92 @@
+from collections import deque
+import numpy as np
+from .vec3 import Vec3
+from . import voxel
+
+""" Reading large regions
+
+    One world.getBlocks call for a big area is slow for the server and the
+    reply has to fit in memory. scanRegion cuts the area into tiles and keeps
+    readAhead getBlocks requests in flight, so the server works on the next
+    tiles while the caller handles the current one.
+
+    Example:
+        for origin, ids in scanRegion(mc, 0, 0, 0, 511, 127, 511):
+            print(origin, (ids == block.DIAMOND_ORE.id).sum())
+"""
+
+def _sizes(tileSize):
+    if isinstance(tileSize, int):
+        return (tileSize, tileSize, tileSize)
+    return tuple(int(v) for v in tileSize)
+
+def tiles(x0, y0, z0, x1, y1, z1, tileSize=32):
+    """Split a cuboid into tiles => [(Vec3 origin, (nx, ny, nz))] in x, z, y order"""
+    sx, sy, sz = _sizes(tileSize)
+    x0, x1 = min(x0, x1), max(x0, x1)
+    y0, y1 = min(y0, y1), max(y0, y1)
+    z0, z1 = min(z0, z1), max(z0, z1)
+    out = []
+    for y in range(y0, y1 + 1, sy):
+        for z in range(z0, z1 + 1, sz):
+            for x in range(x0, x1 + 1, sx):
+                shape = (min(sx, x1 - x + 1), min(sy, y1 - y + 1), min(sz, z1 - z + 1))
+                out.append((Vec3(x, y, z), shape))
+    return out
+
+def scanRegion(mc, x0, y0, z0, x1, y1, z1, tileSize=32, readAhead=4):
+    """Read a cuboid tile by tile => generator of (Vec3 origin, [x, y, z] id array)
+
+    At most readAhead replies are outstanding, so memory stays bounded by
+    the tile size whatever the size of the region."""
+    return scanTiles(mc, tiles(x0, y0, z0, x1, y1, z1, tileSize), readAhead)
+
+def scanTiles(mc, boxes, readAhead=4):
+    """Read a list of (Vec3 origin, (nx, ny, nz)) like tiles() returns => generator of (Vec3 origin, [x, y, z] id array)"""
+    conn = mc.conn
+    binary = "binary" in conn.capabilities
+    todo = deque(boxes)
+    inflight = deque()
+    try:
+        while todo or inflight:
+            while todo and len(inflight) < max(1, readAhead):
+                origin, shape = todo.popleft()
+                corner = (origin.x + shape[0] - 1, origin.y + shape[1] - 1, origin.z + shape[2] - 1)
+                if binary:
+                    conn.requestBinary(b"mcpie.getBlocks", origin, corner)
+                else:
+                    conn.request(b"world.getBlocks", origin, corner)
+                inflight.append((origin, shape))
+            origin, shape = inflight.popleft()
+            yield origin, voxel.parseBlocks(conn.receive(), shape)
+    except GeneratorExit:
+        # a consumer that stops early leaves replies on the wire
+        for _ in inflight:
+            conn.receive()
+        raise
+
+def readRegion(mc, x0, y0, z0, x1, y1, z1, tileSize=32, readAhead=4):
+    """Read a whole cuboid into one array => (Vec3 min corner, [x, y, z] id array)"""
+    lo = Vec3(min(x0, x1), min(y0, y1), min(z0, z1))
+    ids = np.zeros((abs(x1 - x0) + 1, abs(y1 - y0) + 1, abs(z1 - z0) + 1), dtype=np.int32)
+    for origin, tile in scanRegion(mc, x0, y0, z0, x1, y1, z1, tileSize, readAhead):
+        x, y, z = origin.x - lo.x, origin.y - lo.y, origin.z - lo.z
+        ids[x:x + tile.shape[0], y:y + tile.shape[1], z:z + tile.shape[2]] = tile
+    return lo, ids
+
+def readData(mc, origin, ids, skip=0, window=256):
+    """Block data values for the cells of ids that are not skip => [x, y, z] data array
+
+    world.getBlocks only returns ids, so this pipelines one
+    world.getBlockWithData per cell, window requests at a time."""
+    conn = mc.conn
+    data = np.zeros(ids.shape, dtype=np.int32)
+    cells = np.argwhere(ids != skip).tolist()
+    ox, oy, oz = origin
+    for i in range(0, len(cells), window):
+        part = cells[i:i + window]
+        for x, y, z in part:
+            conn.request(b"world.getBlockWithData", ox + x, oy + y, oz + z)
+        for x, y, z in part:
+            data[x, y, z] = int(conn.receive().split(",")[1])
+    return data
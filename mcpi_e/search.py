@@ -0,0 +1,94 @@
+import numpy as np
+from .block import Block
+from .vec3 import Vec3
+
+""" Searching scanned blocks
+
+    Works on [x, y, z] id arrays from Minecraft.scanRegion, voxel.parseBlocks
+    or Snapshot.region instead of calling getBlock for every position.
+    Coordinates are returned as (N, 3) int arrays in world coordinates when
+    an origin is given; toVec3 turns them into a list of Vec3.
+
+    Example:
+        ore = findBlocks(ids, [block.DIAMOND_ORE, block.CHEST], origin)
+        for pos in toVec3(ore):
+            mc.postToChat(str(pos))
+"""
+
+WILDCARD = -1
+
+def _ids(targets):
+    """Block ids of a Block, an id or a list of them"""
+    if isinstance(targets, (Block, int, np.integer)):
+        targets = [targets]
+    return np.array([t.id if isinstance(t, Block) else int(t) for t in targets])
+
+def toVec3(coords):
+    """(N, 3) coordinate array => [Vec3]"""
+    return [Vec3(*c) for c in np.asarray(coords).tolist()]
+
+def findBlocks(ids, targets, origin=(0, 0, 0)):
+    """Positions of all blocks with one of the target ids => (N, 3) array"""
+    hits = np.argwhere(np.isin(ids, _ids(targets)))
+    return hits + np.array(tuple(origin), dtype=hits.dtype)
+
+def countBlocks(ids, targets=None):
+    """Number of blocks per id => {id: count}, only the target ids when given"""
+    values, counts = np.unique(np.asarray(ids), return_counts=True)
+    found = dict(zip(values.tolist(), counts.tolist()))
+    if targets is None:
+        return found
+    return dict((t, found.get(t, 0)) for t in _ids(targets).tolist())
+
+def findInRegion(mc, targets, x0, y0, z0, x1, y1, z1, tileSize=32, readAhead=4):
+    """Scan a cuboid tile by tile and collect the positions of the target blocks => (N, 3) array"""
+    from .scan import scanRegion
+    found = [np.zeros((0, 3), dtype=np.int64)]
+    for origin, ids in scanRegion(mc, x0, y0, z0, x1, y1, z1, tileSize, readAhead):
+        found.append(findBlocks(ids, targets, origin))
+    return np.concatenate(found)
+
+def matchTemplate(ids, template, origin=(0, 0, 0), method="auto"):
+    """Positions where a 3d template fits => (N, 3) array of template corners
+
+    template is an [x, y, z] id array, cells equal to WILDCARD match any
+    block. Small templates are matched by comparing shifted views of the
+    whole array, templates with many cells by FFT correlation, one per
+    distinct id of the template."""
+    ids = np.asarray(ids)
+    template = np.asarray(template)
+    if ids.ndim != 3 or template.ndim != 3:
+        raise ValueError("expected 3d arrays indexed [x, y, z]")
+    out = tuple(n - t + 1 for n, t in zip(ids.shape, template.shape))
+    if min(out) <= 0:
+        return np.zeros((0, 3), dtype=np.int64)
+    cells = np.argwhere(template != WILDCARD)
+    if method == "auto":
+        method = "shift" if len(cells) <= 64 else "fft"
+    if method == "shift":
+        found = _matchShift(ids, template, cells, out)
+    elif method == "fft":
+        found = _matchFFT(ids, template, cells, out)
+    else:
+        raise ValueError("method must be auto, shift or fft")
+    return np.argwhere(found) + np.array(tuple(origin), dtype=np.int64)
+
+def _matchShift(ids, template, cells, out):
+    found = np.ones(out, dtype=bool)
+    for dx, dy, dz in cells.tolist():
+        found &= ids[dx:dx + out[0], dy:dy + out[1], dz:dz + out[2]] == template[dx, dy, dz]
+        if not found.any():
+            break
+    return found
+
+def _matchFFT(ids, template, cells, out):
+    shape = ids.shape
+    score = np.zeros(out)
+    for value in np.unique(template[template != WILDCARD]).tolist():
+        a = np.fft.rfftn((ids == value).astype(np.float64), shape)
+        # correlation is convolution with the template flipped on every axis
+        b = np.fft.rfftn((template[::-1, ::-1, ::-1] == value).astype(np.float64), shape)
+        full = np.fft.irfftn(a * b, shape)
+        t = template.shape
+        score += full[t[0] - 1:t[0] - 1 + out[0], t[1] - 1:t[1] - 1 + out[1], t[2] - 1:t[2] - 1 + out[2]]
+    return score > len(cells) - 0.5
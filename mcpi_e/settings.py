@@ -11,3 +11,56 @@ SYS_SPEED=Speed.MIDDLE
 SHOW_DEBUG=True
 SHOW_Log=True
 
+#limits checked by Connection.send
+MAX_HEIGHT=256
+MAX_SETBLOCKS_LENGTH=300
+MAX_SETBLOCKS_COUNT=1000
+
+#ask the server for protocol extensions (binary batches) when connecting
+NEGOTIATE=False
+
+#seconds player ids, names and entity types are reused, 0 asks the server every time (see metacache)
+META_TTL=0
+#cells of setBlock writes held back and merged before sending, 0 sends every write (see combine)
+COMBINE_WRITES=0
+#seconds after which held writes are sent with the next setBlock, there is no timer (see combine)
+COMBINE_DELAY=0.05
+#file the metadata cache is loaded from and saved to by Minecraft.create
+META_FILE=None
+
+class Settings:
+    """Settings of one connection
+
+    A new instance starts from the module level defaults above, so changing
+    mc.settings.SYS_SPEED only slows down that one Minecraft instance.
+    Keyword arguments override the defaults:
+
+        Settings(SYS_SPEED=Speed.FASTEST, SHOW_DEBUG=False)
+    """
+    Speed = Speed
+
+    def __init__(self, **kwargs):
+        self.SYS_SPEED = SYS_SPEED
+        self.SHOW_DEBUG = SHOW_DEBUG
+        self.SHOW_Log = SHOW_Log
+        self.MAX_HEIGHT = MAX_HEIGHT
+        self.MAX_SETBLOCKS_LENGTH = MAX_SETBLOCKS_LENGTH
+        self.MAX_SETBLOCKS_COUNT = MAX_SETBLOCKS_COUNT
+        self.NEGOTIATE = NEGOTIATE
+        self.META_TTL = META_TTL
+        self.COMBINE_WRITES = COMBINE_WRITES
+        self.COMBINE_DELAY = COMBINE_DELAY
+        self.META_FILE = META_FILE
+        for key, value in kwargs.items():
+            if not hasattr(self, key):
+                raise AttributeError("unknown setting {}".format(key))
+            setattr(self, key, value)
+
+    def copy(self, **kwargs):
+        """A new Settings with the values of this one, overridden by kwargs"""
+        values = dict(self.__dict__)
+        values.update(kwargs)
+        return Settings(**values)
+
+    def __repr__(self):
+        return "Settings(%s)"%", ".join("%s=%r"%(k, v) for k, v in sorted(self.__dict__.items()))
@@ -0,0 +1,198 @@
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
+from .vec3 import Vec3
+
+""" World snapshots on disk
+
+    A snapshot file stores scanned chunks (an origin and [x, y, z] id and
+    data arrays), each compressed on its own with zlib. The file starts with
+    a header and an index block; when an index block is full a new one is
+    appended and linked from the previous one, so chunks can be added while
+    a scan is running without rewriting the file. Readers map the file with
+    mmap and only decompress the chunks they ask for.
+
+    Layout:
+        header       magic, version, entries per index block
+        index block  count, offset of next block, entries
+        entry        origin x,y,z, shape nx,ny,nz, offset, length, id bytes
+        payload      zlib(ids + data), id bytes is the size of the
+                     uncompressed ids, the data bytes follow them
+
+    Example:
+        with Snapshot("castle.snap", "w") as snap:
+            for origin, ids in mc.scanRegion(0, 0, 0, 255, 127, 255):
+                snap.add(origin, ids)
+        ids, data = Snapshot("castle.snap").region(10, 0, 10, 40, 30, 40)
+"""
+
+MAGIC = b"MCPISNAP"
+VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_BLOCK = struct.Struct("<IQ")
+_ENTRY = struct.Struct("<3i3HxxQII")
+
+class SnapshotError(Exception):
+    pass
+
+class Snapshot:
+    """A compressed, chunked snapshot file, mode "r" to read, "a" to add chunks, "w" to create"""
+    def __init__(self, path, mode="r", entriesPerBlock=1024, level=6):
+        if mode not in ("r", "a", "w"):
+            raise ValueError("mode must be r, a or w")
+        self.path = path
+        self.mode = mode
+        self.level = level
+        self.chunks = {}
+        self._blocks = []
+        self._map = None
+        if mode == "w" or (mode == "a" and not os.path.exists(path)):
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, entriesPerBlock))
+                f.write(_BLOCK.pack(0, 0))
+                f.write(b"\0" * (_ENTRY.size * entriesPerBlock))
+        self.file = open(path, "rb" if mode == "r" else "r+b")
+        self._readIndex()
+
+    def _mapped(self, end):
+        """The file mapped at least up to end"""
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _readIndex(self):
+        m = self._mapped(_HEADER.size)
+        magic, version, self.entriesPerBlock = _HEADER.unpack_from(m, 0)
+        if magic != MAGIC:
+            raise SnapshotError("{} is not a snapshot file".format(self.path))
+        if version != VERSION:
+            raise SnapshotError("unsupported snapshot version {}".format(version))
+        offset = _HEADER.size
+        while offset:
+            count, following = _BLOCK.unpack_from(m, offset)
+            self._blocks.append([offset, count])
+            for i in range(count):
+                entry = _ENTRY.unpack_from(m, offset + _BLOCK.size + i * _ENTRY.size)
+                self.chunks[tuple(entry[0:3])] = entry[3:]
+            offset = following
+
+    def add(self, origin, ids, data=None):
+        """Append a chunk at origin (Vec3 or x,y,z), ids and data are [x, y, z] arrays"""
+        if self.mode == "r":
+            raise SnapshotError("snapshot is opened read only")
+        origin = tuple(int(v) for v in origin)
+        ids = np.asarray(ids)
+        if ids.ndim != 3:
+            raise ValueError("expected a 3d array indexed [x, y, z]")
+        if origin in self.chunks:
+            raise SnapshotError("chunk at {} is already stored".format(origin))
+        data = np.zeros(ids.shape, np.uint8) if data is None else np.asarray(data)
+        raw = ids.astype("<u2").tobytes()
+        idBytes = len(raw)
+        payload = zlib.compress(raw + data.astype(np.uint8).tobytes(), self.level)
+        f = self.file
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.write(payload)
+        block = self._blocks[-1]
+        if block[1] == self.entriesPerBlock:
+            block = self._appendBlock()
+        nx, ny, nz = ids.shape
+        entry = origin + (nx, ny, nz, offset, len(payload), idBytes)
+        f.seek(block[0] + _BLOCK.size + block[1] * _ENTRY.size)
+        f.write(_ENTRY.pack(*entry))
+        # the count is written last, a crash before it leaves the file readable
+        block[1] += 1
+        f.seek(block[0])
+        f.write(struct.pack("<I", block[1]))
+        f.flush()
+        self.chunks[origin] = entry[3:]
+
+    def _appendBlock(self):
+        f = self.file
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.write(_BLOCK.pack(0, 0))
+        f.write(b"\0" * (_ENTRY.size * self.entriesPerBlock))
+        previous = self._blocks[-1]
+        f.seek(previous[0] + 4)
+        f.write(struct.pack("<Q", offset))
+        self._blocks.append([offset, 0])
+        return self._blocks[-1]
+
+    def origins(self):
+        """Origins of all stored chunks => [Vec3]"""
+        return [Vec3(*o) for o in sorted(self.chunks)]
+
+    def chunk(self, *origin):
+        """Decompress one chunk (x,y,z) => (ids, data) arrays indexed [x, y, z]"""
+        key = tuple(int(v) for v in (origin[0] if len(origin) == 1 else origin))
+        try:
+            nx, ny, nz, offset, length, idBytes = self.chunks[key]
+        except KeyError:
+            raise SnapshotError("no chunk at {}".format(key))
+        m = self._mapped(offset + length)
+        try:
+            raw = zlib.decompress(m[offset:offset + length])
+        except zlib.error:
+            raise SnapshotError("chunk at {} is damaged".format(key))
+        n = nx * ny * nz
+        if idBytes != 2 * n or len(raw) != idBytes + n:
+            raise SnapshotError("chunk at {} is damaged".format(key))
+        ids = np.frombuffer(raw, "<u2", n).reshape(nx, ny, nz)
+        data = np.frombuffer(raw, np.uint8, n, idBytes).reshape(nx, ny, nz)
+        return ids, data
+
+    def bounds(self):
+        """Smallest cuboid around all chunks => (Vec3 min, Vec3 max)"""
+        if not self.chunks:
+            raise SnapshotError("snapshot is empty")
+        lo = np.min([o for o in self.chunks], axis=0)
+        hi = np.max([np.add(o, c[:3]) - 1 for o, c in self.chunks.items()], axis=0)
+        return Vec3(*lo.tolist()), Vec3(*hi.tolist())
+
+    def region(self, x0, y0, z0, x1, y1, z1, missing=-1):
+        """Assemble a cuboid from the chunks that overlap it => (ids, data), uncovered cells are missing"""
+        lo = np.array([min(x0, x1), min(y0, y1), min(z0, z1)])
+        hi = np.array([max(x0, x1), max(y0, y1), max(z0, z1)])
+        shape = tuple((hi - lo + 1).tolist())
+        ids = np.full(shape, missing, dtype=np.int32)
+        data = np.zeros(shape, dtype=np.uint8)
+        for origin, entry in self.chunks.items():
+            start = np.array(origin)
+            end = start + entry[:3] - 1
+            a, b = np.maximum(start, lo), np.minimum(end, hi)
+            if (a > b).any():
+                continue
+            cids, cdata = self.chunk(origin)
+            src = tuple(slice(i, j + 1) for i, j in zip(a - start, b - start))
+            dst = tuple(slice(i, j + 1) for i, j in zip(a - lo, b - lo))
+            ids[dst] = cids[src]
+            data[dst] = cdata[src]
+        return ids, data
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def saveRegion(mc, path, x0, y0, z0, x1, y1, z1, tileSize=32, readAhead=4):
+    """Scan a cuboid into a new snapshot file, chunk by chunk => number of chunks"""
+    from .scan import scanRegion
+    count = 0
+    with Snapshot(path, "w") as snap:
+        for origin, ids in scanRegion(mc, x0, y0, z0, x1, y1, z1, tileSize, readAhead):
+            snap.add(origin, ids)
+            count += 1
+    return count
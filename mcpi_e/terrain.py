@@ -0,0 +1,149 @@
+import numpy as np
+from . import voxel
+from .block import STONE, DIRT, GRASS, SAND, WATER_STATIONARY
+
+""" Procedural terrain
+
+    Heights come from fractal value noise evaluated with NumPy over a whole
+    tile at once. Every column is stone, a few blocks of dirt and grass on
+    top, or sand near and under the water, with water up to the water
+    level. Each column is a handful of vertical runs, and runs of the same
+    blocks next to each other are merged into setBlocks boxes, so a
+    512x512 terrain is tens of thousands of commands, not millions.
+    Tiles are generated and sent one after the other.
+
+    The noise only depends on the seed and the world coordinates, so tiles
+    fit together and the same terrain can be built in several parts.
+
+    Example:
+        Terrain(seed=7, waterLevel=62).build(mc, -256, -256, 255, 255)
+"""
+
+def _lattice(ix, iz, seed):
+    """Pseudo random value in [-1, 1] for integer lattice points"""
+    h = (ix.astype(np.uint32) * np.uint32(374761393)
+         + iz.astype(np.uint32) * np.uint32(668265263)
+         + np.uint32(seed * 2246822519 & 0xffffffff))
+    h = (h ^ (h >> np.uint32(13))) * np.uint32(1274126177)
+    h ^= h >> np.uint32(16)
+    return h.astype(np.float64) / 2147483647.5 - 1.0
+
+def _valueNoise(x, z, seed):
+    ix, iz = np.floor(x), np.floor(z)
+    fx, fz = x - ix, z - iz
+    # smoothstep, so the slope has no seams at lattice lines
+    fx = fx * fx * (3 - 2 * fx)
+    fz = fz * fz * (3 - 2 * fz)
+    ix, iz = ix.astype(np.int64), iz.astype(np.int64)
+    v00 = _lattice(ix, iz, seed)
+    v10 = _lattice(ix + 1, iz, seed)
+    v01 = _lattice(ix, iz + 1, seed)
+    v11 = _lattice(ix + 1, iz + 1, seed)
+    near = v00 + (v10 - v00) * fx
+    far = v01 + (v11 - v01) * fx
+    return near + (far - near) * fz
+
+def noise(x, z, seed=0, scale=128.0, octaves=4, persistence=0.5, lacunarity=2.0):
+    """Fractal value noise at world coordinates x, z (arrays) => values in [-1, 1]"""
+    x = np.asarray(x, dtype=np.float64) / scale
+    z = np.asarray(z, dtype=np.float64) / scale
+    total = np.zeros(np.broadcast(x, z).shape)
+    amplitude, norm = 1.0, 0.0
+    for octave in range(octaves):
+        total += amplitude * _valueNoise(x, z, seed * 31 + octave)
+        norm += amplitude
+        amplitude *= persistence
+        x, z = x * lacunarity, z * lacunarity
+    return total / norm
+
+class Terrain:
+    """Hills and islands made of layered columns
+
+    The surface is at base + amplitude * noise, clamped to bottom and the
+    height limit of the connection. Columns start at bottom."""
+    def __init__(self, seed=0, base=64, amplitude=24, scale=128.0, octaves=4,
+                 persistence=0.5, waterLevel=60, dirtDepth=3, bottom=0):
+        self.seed = seed
+        self.base = base
+        self.amplitude = amplitude
+        self.scale = scale
+        self.octaves = octaves
+        self.persistence = persistence
+        self.waterLevel = waterLevel
+        self.dirtDepth = dirtDepth
+        self.bottom = bottom
+
+    def heights(self, x0, z0, nx, nz, maxHeight=256):
+        """Surface heights of the columns x0..x0+nx-1, z0..z0+nz-1 => int array [x, z]"""
+        x = np.arange(x0, x0 + nx).reshape(-1, 1)
+        z = np.arange(z0, z0 + nz).reshape(1, -1)
+        n = noise(x, z, self.seed, self.scale, self.octaves, self.persistence)
+        h = np.rint(self.base + self.amplitude * n).astype(np.int64)
+        return np.clip(h, self.bottom, maxHeight)
+
+    def columns(self, heights, maxHeight=256, span=None):
+        """Vertical runs of a height map => box rows (x, y0, z, x, y1, z, id, data), x and z relative
+
+        Stone below the lowest stone in the map is split off, so that the
+        bulk of many columns can merge into a few large boxes. Runs longer
+        than span are cut at multiples of span."""
+        heights = np.asarray(heights)
+        x, z = np.indices(heights.shape)
+        x, z, h = x.reshape(-1), z.reshape(-1), heights.reshape(-1)
+        water = min(self.waterLevel, maxHeight)
+        beach = h <= water + 1
+        stoneTop = h - self.dirtDepth - 1
+        floor = max(int(stoneTop.min()), self.bottom - 1) if len(h) else self.bottom
+        runs = [
+            (self.bottom, np.minimum(stoneTop, floor), STONE),
+            (np.maximum(floor + 1, self.bottom), stoneTop, STONE),
+            (np.maximum(stoneTop + 1, self.bottom), h - 1, DIRT),
+            (h, h, None),
+            (h + 1, np.full_like(h, water), WATER_STATIONARY),
+        ]
+        parts = []
+        for y0, y1, kind in runs:
+            y0 = np.broadcast_to(y0, h.shape)
+            if kind is None:
+                ident = np.where(beach, SAND.id, GRASS.id)
+            else:
+                ident = np.full_like(h, kind.id)
+            keep = y1 >= y0
+            parts.append(np.stack([x, y0, z, x, y1, z, ident, np.zeros_like(h)], axis=1)[keep])
+        rows = np.concatenate(parts).astype(np.int64)
+        if span:
+            rows = _splitY(rows, span)
+        rows = voxel._merge(rows, [0, 3, 1, 4, 6, 7], 2, span)
+        rows = voxel._merge(rows, [2, 5, 1, 4, 6, 7], 0, span)
+        return rows
+
+    def tile(self, x0, z0, nx, nz, settings):
+        """Box rows for one tile, relative to (x0, 0, z0)"""
+        limit = settings.MAX_HEIGHT
+        return self.columns(self.heights(x0, z0, nx, nz, limit), limit, voxel.spanFor(settings))
+
+    def build(self, mc, x0, z0, x1, z1, tileSize=64):
+        """Generate and send the terrain over columns x0..x1, z0..z1 tile by tile => number of boxes sent"""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        z0, z1 = min(z0, z1), max(z0, z1)
+        count = 0
+        for tx in range(x0, x1 + 1, tileSize):
+            for tz in range(z0, z1 + 1, tileSize):
+                nx, nz = min(tileSize, x1 + 1 - tx), min(tileSize, z1 + 1 - tz)
+                rows = self.tile(tx, tz, nx, nz, mc.settings)
+                count += voxel.writeBoxes(mc, rows, (tx, 0, tz))
+        return count
+
+def _splitY(rows, span):
+    """Cut vertical runs where they cross a multiple of span"""
+    first, last = rows[:, 1] // span, rows[:, 4] // span
+    pieces = last - first + 1
+    if (pieces == 1).all():
+        return rows
+    out = np.repeat(rows, pieces, axis=0)
+    # index of every piece within its run
+    step = np.arange(len(out)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    band = np.repeat(first, pieces) + step
+    out[:, 1] = np.maximum(out[:, 1], band * span)
+    out[:, 4] = np.minimum(out[:, 4], band * span + span - 1)
+    return out
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+""" Timeline tracing
+
+    A Tracer attached to a connection records how long each command spends
+    encoding, in the SYS_SPEED sleep, draining, writing to the socket and
+    waiting for a reply. Your own build steps can be added with span().
+    Spans are kept in a ring buffer, only the newest maxSpans are kept, and
+    can be saved as Chrome trace-event JSON for chrome://tracing or
+    https://ui.perfetto.dev.
+
+    Without a tracer the connection only checks one attribute per command.
+
+    Example:
+        tracer = Tracer().attach(mc)
+        with tracer.span("walls"):
+            mc.setBlocks(x, y, z, x + 10, y + 5, z, block.STONE.id)
+        tracer.save("build.json")
+"""
+
+class Tracer:
+    """Ring buffer of timed spans"""
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, maxSpans=100000):
+        self.spans = deque(maxlen=maxSpans)
+        self.start = self.clock()
+
+    def attach(self, mc):
+        """Trace the connection of a Minecraft (or a Connection) => self"""
+        getattr(mc, "conn", mc).tracer = self
+        return self
+
+    def detach(self, mc):
+        getattr(mc, "conn", mc).tracer = None
+
+    def add(self, name, begin, category="mcpi", end=None):
+        """Record a span that started at begin (a clock() value) and ends now or at end"""
+        if end is None:
+            end = self.clock()
+        self.spans.append((name, category, begin, end - begin, threading.current_thread().ident))
+
+    def span(self, name, category="user"):
+        """Context manager that records the time spent inside it"""
+        return _Span(self, name, category)
+
+    def clear(self):
+        self.spans.clear()
+
+    def summary(self):
+        """Total seconds and count per span name => {name: (seconds, count)}"""
+        totals = {}
+        for name, _, _, duration, _ in list(self.spans):
+            seconds, count = totals.get(name, (0.0, 0))
+            totals[name] = (seconds + duration, count + 1)
+        return totals
+
+    def events(self):
+        """The spans as Chrome trace events"""
+        pid = os.getpid()
+        return [{"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                 "ts": (begin - self.start) * 1e6, "dur": duration * 1e6}
+                for name, category, begin, duration, tid in list(self.spans)]
+
+    def save(self, path):
+        """Write the spans as Chrome trace-event JSON"""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f)
+
+class _Span:
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.begin = self.tracer.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.begin, self.category)
@@ -0,0 +1,92 @@
+import socket
+import select
+
+""" Transports carry the bytes of a Connection
+
+    TCPTransport is the usual connection to a RaspberryJuice server,
+    UnixTransport does the same over a Unix domain socket (e.g. to a local
+    proxy) and MemoryTransport hands commands straight to an in-process
+    MemoryWorld without any system calls.
+
+    A transport has sendall(bytes), readline() => bytes, read(n) => bytes,
+    ready(timeout) => bool, recv(n) => bytes and close(). readline and recv
+    return b"" when the other side has gone.
+"""
+
+def connect(address, port):
+    """The transport for an address, "unix:/path" selects a Unix domain socket"""
+    if address.startswith("unix:"):
+        return UnixTransport(address[len("unix:"):])
+    return TCPTransport(address, port)
+
+class SocketTransport:
+    """Transport over a connected stream socket"""
+    def __init__(self, sock):
+        self.socket = sock
+        self.reader = sock.makefile("rb")
+
+    def sendall(self, data):
+        self.socket.sendall(data)
+
+    def readline(self):
+        return self.reader.readline()
+
+    def read(self, n):
+        return self.reader.read(n)
+
+    def ready(self, timeout=0.0):
+        readable, _, _ = select.select([self.socket], [], [], timeout)
+        return bool(readable)
+
+    def recv(self, n):
+        return self.socket.recv(n)
+
+    def close(self):
+        self.socket.close()
+
+class TCPTransport(SocketTransport):
+    def __init__(self, address, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect((address, port))
+        SocketTransport.__init__(self, sock)
+
+class UnixTransport(SocketTransport):
+    def __init__(self, path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        SocketTransport.__init__(self, sock)
+
+class MemoryTransport:
+    """Transport to a MemoryWorld in the same process"""
+    def __init__(self, world):
+        self.world = world
+        self.output = bytearray()
+        self.closed = False
+
+    def sendall(self, data):
+        if self.closed:
+            raise socket.error("transport is closed")
+        self.output += self.world.execute(data)
+
+    def readline(self):
+        end = self.output.find(b"\n")
+        if end < 0:
+            # nothing will ever arrive, like a server that hung up
+            return b""
+        line = bytes(self.output[:end + 1])
+        del self.output[:end + 1]
+        return line
+
+    def read(self, n):
+        data = bytes(self.output[:n])
+        del self.output[:n]
+        return data
+
+    def ready(self, timeout=0.0):
+        return bool(self.output)
+
+    def recv(self, n):
+        return self.read(n)
+
+    def close(self):
+        self.closed = True
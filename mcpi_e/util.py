@@ -1,11 +1,21 @@
-import collections
+try:
+    from collections.abc import Iterable
+except ImportError:
+    from collections import Iterable
 
 def flatten(l):
     for e in l:
-        if isinstance(e, collections.Iterable) and not isinstance(e, str):
+        if isinstance(e, Iterable) and not isinstance(e, str):
             for ee in flatten(e): yield ee
         else: yield e
 
+def expectsReply(name):
+    """Does a text command (e.g. "world.getBlock") get a reply from RaspberryJuice"""
+    parts = name.split(".")
+    last = parts[-1]
+    return (any(p.startswith("get") for p in parts) or last.startswith("remove")
+            or last.startswith("spawn") or last in ("hits", "posts"))
+
 def flatten_parameters_to_bytestring(l):
     return b",".join(map(_misc_to_bytes, flatten(l)))
 
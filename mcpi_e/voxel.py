@@ -0,0 +1,169 @@
+import numpy as np
+from .logger import warn
+
+""" Helpers for blocks held in local NumPy arrays
+
+    Volumes are indexed [x, y, z] like world coordinates. A box is a row
+    (x0, y0, z0, x1, y1, z1, id, data) with inclusive corners, ready to be
+    sent with Minecraft.setBlocks.
+"""
+
+def spanFor(settings):
+    """Longest edge of a box that always passes the setBlocks size check in Connection.send"""
+    return max(1, settings.MAX_SETBLOCKS_LENGTH // 3)
+
+def _merge(rows, keys, axis, span):
+    """Merge boxes that have equal key columns and touch along axis"""
+    if len(rows) == 0:
+        return rows
+    lo, hi = rows[:, axis], rows[:, axis + 3]
+    bucket = lo // span if span else np.zeros_like(lo)
+    order = np.lexsort([lo] + [rows[:, k] for k in keys][::-1] + [bucket])
+    rows = rows[order]
+    lo, hi, bucket = rows[:, axis], rows[:, axis + 3], bucket[order]
+    start = np.ones(len(rows), dtype=bool)
+    same = np.all(rows[1:, keys] == rows[:-1, keys], axis=1)
+    same &= bucket[1:] == bucket[:-1]
+    same &= lo[1:] == hi[:-1] + 1
+    start[1:] = ~same
+    first = np.flatnonzero(start)
+    merged = rows[first].copy()
+    merged[:, axis + 3] = np.maximum.reduceat(hi, first)
+    return merged
+
+def boxes(ids, data=None, skip=None, span=None):
+    """Cover a volume with boxes of equal blocks => array of (x0,y0,z0,x1,y1,z1,id,data)
+
+    Runs along z are merged first, then across x and then across y, all with
+    NumPy. Cells equal to skip (e.g. -1 for "leave alone") are not covered.
+    With span, no box edge crosses a multiple of span, so every box is at
+    most span blocks long on each side."""
+    ids = np.asarray(ids)
+    if ids.ndim != 3:
+        raise ValueError("expected a 3d array indexed [x, y, z]")
+    data = np.zeros_like(ids) if data is None else np.broadcast_to(np.asarray(data), ids.shape)
+    nx, ny, nz = ids.shape
+    if ids.size == 0:
+        return np.zeros((0, 8), dtype=np.int64)
+    key = ids.astype(np.int64) * 256 + data.astype(np.int64)
+
+    # runs along z
+    lines = key.reshape(nx * ny, nz)
+    change = np.ones(lines.shape, dtype=bool)
+    change[:, 1:] = lines[:, 1:] != lines[:, :-1]
+    if span:
+        change[:, ::span] = True
+    line, z0 = np.nonzero(change)
+    flat = np.flatnonzero(change)
+    # every line starts with a change, so a run never wraps into the next line
+    z1 = np.append(flat[1:], lines.size) - 1 - line * nz
+    x, y = line // ny, line % ny
+    ident = ids.reshape(-1)[flat]
+    value = data.reshape(-1)[flat]
+    rows = np.stack([x, y, z0, x, y, z1, ident, value], axis=1).astype(np.int64)
+    if skip is not None:
+        rows = rows[rows[:, 6] != skip]
+
+    rows = _merge(rows, [1, 4, 2, 5, 6, 7], 0, span)
+    rows = _merge(rows, [0, 3, 2, 5, 6, 7], 1, span)
+    return rows
+
+def writeBoxes(mc, rows, origin=(0, 0, 0)):
+    """Send boxes to the world at origin, single blocks use setBlock => number of boxes sent
+
+    Over a connection that negotiated the binary protocol the boxes go out
+    as packed mcpie.setBlocks frames instead of one text line each."""
+    if "binary" in mc.conn.capabilities:
+        return _writeBinary(mc.conn, rows, origin)
+    ox, oy, oz = (int(v) for v in origin)
+    count = 0
+    for x0, y0, z0, x1, y1, z1, ident, value in rows.tolist():
+        if x0 == x1 and y0 == y1 and z0 == z1:
+            mc.setBlock(ox + x0, oy + y0, oz + z0, ident, value)
+        else:
+            mc.setBlocks(ox + x0, oy + y0, oz + z0, ox + x1, oy + y1, oz + z1, ident, value)
+        count += 1
+    return count
+
+BATCH_ROWS = 4096
+
+def _writeBinary(conn, rows, origin):
+    """mcpie.setBlocks frames: header (count,ox,oy,oz), rows of 8 int16 relative to the origin"""
+    rows = np.asarray(rows)
+    ox, oy, oz = (int(v) for v in origin)
+    # the height check Connection.send does for text commands
+    limit = conn.settings.MAX_HEIGHT
+    high = (np.abs(rows[:, 1] + oy) > limit) | (np.abs(rows[:, 4] + oy) > limit)
+    if high.any():
+        warn("max height of building is {}, {} boxes skipped".format(limit, int(high.sum())))
+        rows = rows[~high]
+    # and its size check for setBlocks, with the same h, w, l
+    size = np.abs(rows[:, 3:6] - rows[:, 0:3]).astype(np.int64)
+    large = ((size.sum(axis=1) > conn.settings.MAX_SETBLOCKS_LENGTH)
+             & (size.prod(axis=1) > conn.settings.MAX_SETBLOCKS_COUNT))
+    if large.any():
+        warn("setBlocks failed, Please limit your block size (h+l+w)<{} and h*l*w<{}, {} boxes skipped".format(
+            conn.settings.MAX_SETBLOCKS_LENGTH, conn.settings.MAX_SETBLOCKS_COUNT, int(large.sum())))
+        rows = rows[~large]
+    if len(rows) and (rows.min() < -32768 or rows.max() > 32767):
+        raise ValueError("box coordinates do not fit the binary frame, use a closer origin")
+    rows = rows.astype("<i2")
+    for i in range(0, len(rows), BATCH_ROWS):
+        part = rows[i:i + BATCH_ROWS]
+        conn.sendBinary(b"mcpie.setBlocks", (len(part), ox, oy, oz), part.tobytes())
+    return len(rows)
+
+def fill(rows, shape, skip=0):
+    """Paint boxes back into dense (ids, data) arrays of shape, the inverse of boxes()"""
+    ids = np.full(shape, skip, dtype=np.int32)
+    data = np.zeros(shape, dtype=np.int32)
+    for x0, y0, z0, x1, y1, z1, ident, value in np.asarray(rows).tolist():
+        ids[x0:x1 + 1, y0:y1 + 1, z0:z1 + 1] = ident
+        data[x0:x1 + 1, y0:y1 + 1, z0:z1 + 1] = value
+    return ids, data
+
+def parseBlocks(reply, shape):
+    """Turn a world.getBlocks reply (text, or bytes from mcpie.getBlocks) into an [x, y, z] array of ids
+
+    The server lists blocks y by y, then x, then z."""
+    nx, ny, nz = shape
+    if isinstance(reply, bytes):
+        values = np.frombuffer(reply, dtype="<u2").astype(np.int32)
+    else:
+        values = np.array(reply.split(","), dtype=np.int32)
+    if values.size != nx * ny * nz:
+        raise ValueError("expected {} blocks, got {}".format(nx * ny * nz, values.size))
+    return values.reshape(ny, nx, nz).transpose(1, 0, 2)
+
+def rotate(volume, turns):
+    """Rotate an [x, y, z] array around y in quarter turns
+
+    One turn moves (x, z) to (-z, x) like Vec3.rotateRight, negative turns
+    go the other way like Vec3.rotateLeft."""
+    turns %= 4
+    for _ in range(turns):
+        volume = volume.transpose(2, 1, 0)[::-1, :, :]
+    return volume
+
+def mirror(volume, axes):
+    """Flip an [x, y, z] array along the named axes, e.g. mirror(volume, "xz")"""
+    for axis in axes:
+        volume = np.flip(volume, "xyz".index(axis))
+    return volume
+
+def replace(ids, data, mapping):
+    """Swap blocks, mapping is {Block or id: Block or id} => (ids, data)
+
+    An id key matches every data value, a Block key only its own data."""
+    src, srcData = ids, data
+    ids, data = ids.copy(), data.copy()
+    for old, new in mapping.items():
+        if hasattr(old, "id"):
+            cells = (src == old.id) & (srcData == old.data)
+        else:
+            cells = src == int(old)
+        if hasattr(new, "id"):
+            ids[cells], data[cells] = new.id, new.data
+        else:
+            ids[cells], data[cells] = int(new), 0
+    return ids, data
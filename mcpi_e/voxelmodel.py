@@ -0,0 +1,304 @@
+import numpy as np
+from . import voxel
+
+""" Sparse block models
+
+    A VoxelModel holds a design that is too big for a dense array, e.g. a
+    whole castle, in a hashed brick map: the space is cut into bricks of
+    16x16x16 cells, bricks without blocks are not stored at all and a brick
+    of one single block is stored as that one value. Only bricks along the
+    surface of the design need a dense 8 kB array, so memory grows with the
+    surface and not with the volume.
+
+    Models are combined with union (|), difference (-) and intersection
+    (&), moved with translate and turned with rotate; all of these make a
+    new model and work brick by brick. boxes() turns a model into setBlocks
+    rows: single-block bricks are already cuboids, the other bricks are
+    covered with voxel.boxes, and the boxes are then joined across brick
+    edges.
+
+    Example:
+        hall = VoxelModel().fill(0, 0, 0, 199, 40, 199, block.STONE.id)
+        hall = hall - VoxelModel().fill(1, 1, 1, 198, 39, 198, block.STONE.id)
+        hall.place(mc, x, y, z)
+"""
+
+BRICK = 16
+EMPTY = 0xFFFF
+_BYTES = BRICK ** 3 * 2
+
+def _key(ident, data=0):
+    return int(ident) * 16 + int(data)
+
+class VoxelModel:
+    """Blocks stored in sparse 16x16x16 bricks, None where there is no block"""
+    def __init__(self, maxBytes=None):
+        self.bricks = {}       # (bx, by, bz) => key (a uniform brick) or uint16 array
+        # bricks whose array belongs to this model and may be changed; a shared
+        # array is owned by neither model, each copies it before a change
+        self.owned = set()
+        self.maxBytes = maxBytes
+        self.dense = 0
+
+    def copy(self):
+        model = VoxelModel(self.maxBytes)
+        model.bricks = dict(self.bricks)
+        model.dense = self.dense
+        self.owned.clear()
+        return model
+
+    def nbytes(self):
+        """Bytes used by the dense bricks"""
+        return _BYTES * self.dense
+
+    def __len__(self):
+        """Number of cells with a block"""
+        return sum(BRICK ** 3 if isinstance(v, int) else int((v != EMPTY).sum()) for v in self.bricks.values())
+
+    def _dense(self, pos):
+        """Array of a brick that this model may change"""
+        value = self.bricks.get(pos)
+        if isinstance(value, np.ndarray) and pos in self.owned:
+            return value
+        if value is None:
+            array = np.full((BRICK,) * 3, EMPTY, dtype=np.uint16)
+        elif isinstance(value, int):
+            array = np.full((BRICK,) * 3, value, dtype=np.uint16)
+        else:
+            array = value.copy()
+        self._store(pos, array)
+        return array
+
+    def _store(self, pos, value, owned=True):
+        """Set a brick, turning arrays of one value into that value
+
+        owned=False for an array that is shared with another model."""
+        if isinstance(value, np.ndarray):
+            first = value.flat[0]
+            if (value == first).all():
+                value = None if first == EMPTY else int(first)
+        if isinstance(self.bricks.get(pos), np.ndarray):
+            self.dense -= 1
+        self.owned.discard(pos)
+        if value is None:
+            self.bricks.pop(pos, None)
+            return
+        self.bricks[pos] = value
+        if isinstance(value, np.ndarray):
+            self.dense += 1
+            if owned:
+                self.owned.add(pos)
+            if self.maxBytes is not None and self.nbytes() > self.maxBytes:
+                raise MemoryError("model needs more than {} bytes".format(self.maxBytes))
+
+    def get(self, x, y, z):
+        """Block at a cell => (id, data) or None"""
+        value = self.bricks.get((x // BRICK, y // BRICK, z // BRICK))
+        if value is None:
+            return None
+        if not isinstance(value, int):
+            value = int(value[x % BRICK, y % BRICK, z % BRICK])
+            if value == EMPTY:
+                return None
+        return (value // 16, value % 16)
+
+    def set(self, x, y, z, ident, data=0):
+        """Set one cell, ident None removes the block => self"""
+        pos = (x // BRICK, y // BRICK, z // BRICK)
+        array = self._dense(pos)
+        array[x % BRICK, y % BRICK, z % BRICK] = EMPTY if ident is None else _key(ident, data)
+        self._store(pos, array)
+        return self
+
+    def fill(self, x0, y0, z0, x1, y1, z1, ident, data=0):
+        """Set a cuboid, ident None removes the blocks => self"""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        z0, z1 = min(z0, z1), max(z0, z1)
+        value = None if ident is None else _key(ident, data)
+        for bx in range(x0 // BRICK, x1 // BRICK + 1):
+            for by in range(y0 // BRICK, y1 // BRICK + 1):
+                for bz in range(z0 // BRICK, z1 // BRICK + 1):
+                    ox, oy, oz = bx * BRICK, by * BRICK, bz * BRICK
+                    lo = (max(x0, ox) - ox, max(y0, oy) - oy, max(z0, oz) - oz)
+                    hi = (min(x1, ox + BRICK - 1) - ox, min(y1, oy + BRICK - 1) - oy, min(z1, oz + BRICK - 1) - oz)
+                    if lo == (0, 0, 0) and hi == (BRICK - 1,) * 3:
+                        self._store((bx, by, bz), value)
+                        continue
+                    array = self._dense((bx, by, bz))
+                    array[lo[0]:hi[0] + 1, lo[1]:hi[1] + 1, lo[2]:hi[2] + 1] = EMPTY if value is None else value
+                    self._store((bx, by, bz), array)
+        return self
+
+    def paste(self, origin, ids, data=None, skip=-1):
+        """Copy an [x, y, z] id array into the model at origin, cells equal to skip are left alone => self"""
+        ids = np.asarray(ids)
+        data = np.zeros_like(ids) if data is None else np.broadcast_to(np.asarray(data), ids.shape)
+        keys = np.where(ids == skip, EMPTY, ids.astype(np.int64) * 16 + data).astype(np.uint16)
+        self._paste(tuple(int(v) for v in origin), keys)
+        return self
+
+    def _paste(self, origin, keys):
+        """Write an array of keys at origin, EMPTY cells are left alone"""
+        ox, oy, oz = origin
+        nx, ny, nz = keys.shape
+        for bx in range(ox // BRICK, (ox + nx - 1) // BRICK + 1):
+            for by in range(oy // BRICK, (oy + ny - 1) // BRICK + 1):
+                for bz in range(oz // BRICK, (oz + nz - 1) // BRICK + 1):
+                    # the part of keys inside this brick
+                    sx, sy, sz = max(ox, bx * BRICK), max(oy, by * BRICK), max(oz, bz * BRICK)
+                    ex = min(ox + nx, (bx + 1) * BRICK)
+                    ey = min(oy + ny, (by + 1) * BRICK)
+                    ez = min(oz + nz, (bz + 1) * BRICK)
+                    part = keys[sx - ox:ex - ox, sy - oy:ey - oy, sz - oz:ez - oz]
+                    cells = part != EMPTY
+                    if not cells.any():
+                        continue
+                    array = self._dense((bx, by, bz))
+                    target = array[sx - bx * BRICK:ex - bx * BRICK, sy - by * BRICK:ey - by * BRICK,
+                                   sz - bz * BRICK:ez - bz * BRICK]
+                    target[cells] = part[cells]
+                    self._store((bx, by, bz), array)
+
+    @staticmethod
+    def fromArray(ids, data=None, origin=(0, 0, 0), skip=-1):
+        """A model of an [x, y, z] id array placed at origin"""
+        return VoxelModel().paste(origin, ids, data, skip)
+
+    def bounds(self):
+        """Min and max corner of the stored bricks => ((x0, y0, z0), (x1, y1, z1)) or None, not trimmed to the blocks"""
+        if not self.bricks:
+            return None
+        keys = np.array(list(self.bricks))
+        lo = keys.min(axis=0) * BRICK
+        hi = keys.max(axis=0) * BRICK + BRICK - 1
+        return tuple(int(v) for v in lo), tuple(int(v) for v in hi)
+
+    def toArray(self, skip=-1):
+        """Dense copy of the model => (origin, ids, data), cells without a block are skip"""
+        box = self.bounds()
+        if box is None:
+            return (0, 0, 0), np.zeros((0, 0, 0), dtype=np.int32), np.zeros((0, 0, 0), dtype=np.int32)
+        lo, hi = box
+        keys = np.full(tuple(h - l + 1 for l, h in zip(lo, hi)), EMPTY, dtype=np.uint16)
+        for (bx, by, bz), value in self.bricks.items():
+            x, y, z = bx * BRICK - lo[0], by * BRICK - lo[1], bz * BRICK - lo[2]
+            keys[x:x + BRICK, y:y + BRICK, z:z + BRICK] = value
+        keys = keys.astype(np.int32)
+        empty = keys == EMPTY
+        return lo, np.where(empty, skip, keys // 16), np.where(empty, 0, keys % 16)
+
+    def _brick(self, pos):
+        """Array of a brick for reading"""
+        value = self.bricks.get(pos)
+        if value is None:
+            return np.full((BRICK,) * 3, EMPTY, dtype=np.uint16)
+        if isinstance(value, int):
+            return np.full((BRICK,) * 3, value, dtype=np.uint16)
+        return value
+
+    def union(self, other):
+        """Blocks of both models, other wins where both have a block"""
+        model = self.copy()
+        for pos, value in other.bricks.items():
+            if isinstance(value, int) or pos not in model.bricks:
+                model._store(pos, value if isinstance(value, int) else value.copy())
+            else:
+                model._store(pos, np.where(value != EMPTY, value, model._brick(pos)))
+        return model
+
+    def difference(self, other):
+        """Blocks of this model where other has none"""
+        model = self.copy()
+        for pos, value in other.bricks.items():
+            if pos not in model.bricks:
+                continue
+            if isinstance(value, int):
+                model._store(pos, None)
+            else:
+                model._store(pos, np.where(value != EMPTY, EMPTY, model._brick(pos)).astype(np.uint16))
+        return model
+
+    def intersection(self, other):
+        """Blocks of this model where other has a block too"""
+        model = VoxelModel(self.maxBytes)
+        for pos, value in self.bricks.items():
+            mask = other.bricks.get(pos)
+            if mask is None:
+                continue
+            if isinstance(mask, int):
+                model._store(pos, value, owned=False)
+                self.owned.discard(pos)
+            else:
+                model._store(pos, np.where(mask != EMPTY, self._brick(pos), EMPTY).astype(np.uint16))
+        return model
+
+    __or__ = union
+    __sub__ = difference
+    __and__ = intersection
+
+    def translate(self, dx, dy, dz):
+        """The model moved by dx, dy, dz"""
+        if dx % BRICK == 0 and dy % BRICK == 0 and dz % BRICK == 0:
+            model = VoxelModel(self.maxBytes)
+            step = (dx // BRICK, dy // BRICK, dz // BRICK)
+            model.bricks = dict(((bx + step[0], by + step[1], bz + step[2]), v) for (bx, by, bz), v in self.bricks.items())
+            model.dense = self.dense
+            self.owned.clear()
+            return model
+        model = VoxelModel(self.maxBytes)
+        for (bx, by, bz), value in self.bricks.items():
+            origin = (bx * BRICK + dx, by * BRICK + dy, bz * BRICK + dz)
+            if isinstance(value, int):
+                model.fill(origin[0], origin[1], origin[2], origin[0] + BRICK - 1, origin[1] + BRICK - 1,
+                           origin[2] + BRICK - 1, value // 16, value % 16)
+            else:
+                model._paste(origin, value)
+        return model
+
+    def rotate(self, turns):
+        """The model turned around the vertical line x=0, z=0 in quarter turns
+
+        One turn moves the cell (x, z) to (-1-z, x), the direction of
+        voxel.rotate and Vec3.rotateRight; bricks stay bricks, so nothing is
+        copied cell by cell."""
+        turns %= 4
+        model = VoxelModel(self.maxBytes)
+        for (bx, by, bz), value in self.bricks.items():
+            for _ in range(turns):
+                bx, bz = -1 - bz, bx
+            if isinstance(value, int):
+                model._store((bx, by, bz), value)
+            else:
+                model._store((bx, by, bz), np.ascontiguousarray(voxel.rotate(value, turns)))
+        return model
+
+    def boxes(self, span=None):
+        """Cuboids covering the model => array of (x0,y0,z0,x1,y1,z1,id,data) in world coordinates"""
+        # boxes must not cross a multiple of span, brick edges are multiples of BRICK
+        if span and span >= BRICK:
+            span = span // BRICK * BRICK
+        uniform, parts = [], []
+        for (bx, by, bz), value in self.bricks.items():
+            x, y, z = bx * BRICK, by * BRICK, bz * BRICK
+            if isinstance(value, int) and not (span and span < BRICK):
+                uniform.append((x, y, z, x + BRICK - 1, y + BRICK - 1, z + BRICK - 1, value // 16, value % 16))
+                continue
+            keys = self._brick((bx, by, bz)).astype(np.int32)
+            empty = keys == EMPTY
+            rows = voxel.boxes(np.where(empty, -1, keys // 16), np.where(empty, 0, keys % 16), skip=-1, span=span)
+            rows[:, [0, 3]] += x
+            rows[:, [1, 4]] += y
+            rows[:, [2, 5]] += z
+            parts.append(rows)
+        rows = np.concatenate([np.array(uniform, dtype=np.int64).reshape(-1, 8)] + parts)
+        # join boxes across brick edges
+        rows = voxel._merge(rows, [0, 3, 1, 4, 6, 7], 2, span)
+        rows = voxel._merge(rows, [1, 4, 2, 5, 6, 7], 0, span)
+        rows = voxel._merge(rows, [0, 3, 2, 5, 6, 7], 1, span)
+        return rows
+
+    def place(self, mc, x=0, y=0, z=0):
+        """Send the model with its (0, 0, 0) at x, y, z => number of commands"""
+        rows = self.boxes(voxel.spanFor(mc.settings))
+        return voxel.writeBoxes(mc, rows, (x, y, z))
@@ -0,0 +1,110 @@
+import hashlib
+import time
+import numpy as np
+from .event import BlockChangeEvent
+from .scan import tiles, scanTiles
+
+""" Watching a region for changes
+
+    RegionWatcher reads a region again and again with world.getBlocks and
+    reports every block that changed, whoever or whatever changed it (block
+    hit events only report sword hits). Each tile keeps a short hash and the
+    array of its last scan; a tile whose hash is the same is not compared
+    any further.
+
+    Tiles are not all read equally often. A tile that changed is read again
+    sooner (down to minInterval seconds), a quiet tile later and later (up
+    to maxInterval). All tiles share a budget of getBlocks reads per second,
+    the tiles that are most overdue go first.
+
+    Example:
+        watcher = RegionWatcher(mc, -64, 0, -64, 63, 127, 63, budget=20)
+        while True:
+            for e in watcher.poll():
+                print(e)
+            time.sleep(0.1)
+"""
+
+class _Tile:
+    def __init__(self, origin, shape):
+        self.origin = origin
+        self.shape = shape
+        self.digest = None
+        self.ids = None
+        self.interval = 0.0
+        self.due = 0.0
+        self.changes = 0
+
+def digest(ids):
+    """Short hash of a tile"""
+    return hashlib.blake2b(np.ascontiguousarray(ids, dtype=np.int32).tobytes(), digest_size=8).digest()
+
+class RegionWatcher:
+    """Reports block changes in the cuboid x0,y0,z0 - x1,y1,z1"""
+    clock = staticmethod(time.time)
+
+    def __init__(self, mc, x0, y0, z0, x1, y1, z1, tileSize=16, budget=20.0,
+                 minInterval=1.0, maxInterval=60.0, readAhead=4):
+        self.mc = mc
+        self.budget = budget
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.readAhead = readAhead
+        self.tiles = [_Tile(origin, shape) for origin, shape in tiles(x0, y0, z0, x1, y1, z1, tileSize)]
+        self.tokens = float(budget)
+        self.last = self.clock()
+        self.reads = 0
+
+    def poll(self):
+        """Read the tiles that are due, as many as the budget allows => [BlockChangeEvent]
+
+        The first read of a tile only remembers it and reports nothing."""
+        now = self.clock()
+        # the budget refills over time, at most one second worth is saved up
+        self.tokens = min(max(1.0, float(self.budget)), self.tokens + (now - self.last) * self.budget)
+        self.last = now
+        due = sorted((t for t in self.tiles if t.due <= now), key=lambda t: t.due)
+        due = due[:int(self.tokens)]
+        if not due:
+            return []
+        self.tokens -= len(due)
+        events = []
+        for tile, (origin, ids) in zip(due, scanTiles(self.mc, [(t.origin, t.shape) for t in due], self.readAhead)):
+            self.reads += 1
+            events.extend(self._compare(tile, ids, now))
+        return events
+
+    def _compare(self, tile, ids, now):
+        h = digest(ids)
+        events = []
+        if tile.digest is None:
+            tile.interval = self.minInterval
+        elif h == tile.digest:
+            tile.interval = min(self.maxInterval, tile.interval * 1.5)
+        else:
+            changed = np.argwhere(ids != tile.ids)
+            o = tile.origin
+            events = [BlockChangeEvent.Changed(o.x + x, o.y + y, o.z + z, int(tile.ids[x, y, z]), int(ids[x, y, z]))
+                      for x, y, z in changed.tolist()]
+            tile.changes += 1
+            tile.interval = max(self.minInterval, tile.interval / 2.0)
+        tile.digest = h
+        tile.ids = ids
+        tile.due = now + tile.interval
+        return events
+
+    def scanAll(self):
+        """Read every tile now, ignoring the budget => [BlockChangeEvent]"""
+        now = self.clock()
+        events = []
+        for tile, (origin, ids) in zip(self.tiles, scanTiles(self.mc, [(t.origin, t.shape) for t in self.tiles], self.readAhead)):
+            self.reads += 1
+            events.extend(self._compare(tile, ids, now))
+        return events
+
+    def watch(self, period=0.1):
+        """Poll forever => generator of BlockChangeEvent"""
+        while True:
+            for event in self.poll():
+                yield event
+            time.sleep(period)
@@ -68,12 +68,7 @@ __classifiers__ = [
     "Topic :: Education",
     "Topic :: Games/Entertainment",
     "License :: OSI Approved :: MIT License",
-    "Programming Language :: Python :: 2",
-    "Programming Language :: Python :: 2.7",
     "Programming Language :: Python :: 3",
-    "Programming Language :: Python :: 3.3",
-    "Programming Language :: Python :: 3.4",
-    "Programming Language :: Python :: 3.5",
     "Programming Language :: Python :: 3.6",
     "Programming Language :: Python :: 3.7",
     "Programming Language :: Python :: 3.8",
@@ -90,5 +85,7 @@ setup(name=__project__,
       author_email = __author_email__,
       license = __license__,
       packages = [__project__],
+      python_requires = '>=3.6',
+      extras_require = {'numpy': ['numpy']},
       classifiers = __classifiers__,
       zip_safe=False)
\ No newline at end of file
@@ -20,8 +20,9 @@ print("Is show log msg",mc.settings.SHOW_Log)
 print("system speed:",mc.settings.SYS_SPEED)
 mc.settings.SYS_SPEED=mc.settings.Speed.FAST
 (x,y,z)=pos=mc.player.getTilePos()
-debug("this will not dispaly")
-log(pos)
+#debug and log follow the flags of mc.settings when it is given
+debug("this will not dispaly", settings=mc.settings)
+log(pos, settings=mc.settings)
 warn("warn")
 
 
@@ -0,0 +1,58 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.animation import Animation
+from mcpi_e import block
+
+world=MemoryWorld()
+mc=world.connect()
+
+def frames(n):
+    for step in range(n):
+        ids=np.zeros((10,1,3),dtype=int)
+        ids[step,0,:]=block.GOLD_BLOCK.id
+        yield ids
+
+#the first frame goes out in full, later ones only send what changed
+anim=Animation(mc,(0,5,0))
+first,second=list(frames(2))
+assert anim.show(first)>=1
+assert len(anim.delta(second))==2
+assert len(anim.delta(first))==0
+anim.show(second)
+ids,data=world.getBlocks(0,5,0,9,5,2)
+assert (ids==second).all()
+print("delta ok")
+
+#skipped cells keep what is in the world
+mc.setBlock(5,5,1,block.STONE.id)
+third=np.full((10,1,3),-1)
+third[9,0,:]=block.GLASS.id
+anim.show(third)
+assert world.getBlock(5,5,1)==(block.STONE.id,0)
+assert world.getBlock(9,5,0)==(block.GLASS.id,0) and world.getBlock(1,5,0)==(block.GOLD_BLOCK.id,0)
+try:
+    anim.delta(np.zeros((2,2,2)))
+    assert False
+except ValueError:
+    pass
+print("skip ok")
+
+#a clock the sleeps move, and a connection that takes 0.25s per frame at 10 fps
+now=[0.0]
+class Slow(Animation):
+    clock=staticmethod(lambda: now[0])
+    sleep=staticmethod(lambda s: now.__setitem__(0,now[0]+s))
+    def show(self,ids,data=None):
+        now[0]+=0.25
+        return Animation.show(self,ids,data)
+slow=Slow(mc,(0,10,0),fps=10)
+slow.play(frames(10))
+assert slow.dropped>0 and slow.shown+slow.dropped==10
+#the last frame is always shown, and the world matches it
+ids,data=world.getBlocks(0,10,0,9,10,2)
+assert (ids==list(frames(10))[-1]).all()
+#on time, nothing is dropped
+fast=Slow(mc,(0,20,0),fps=1)
+fast.play(frames(4),loops=2)
+assert fast.dropped==0 and fast.shown==8
+print("play ok")
@@ -0,0 +1,67 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.floodfill import connected, label, floodFill, replaceConnected, components, FillLimitError
+from mcpi_e import block
+
+#two rooms of glass walls, one of them with a hole
+world=MemoryWorld()
+mc=world.connect()
+mc.setBlocks(0,0,0,6,6,6,block.GLASS.id)
+mc.setBlocks(1,1,1,5,5,5,block.AIR.id)
+mc.setBlocks(10,0,0,16,6,6,block.GLASS.id)
+mc.setBlocks(11,1,1,15,5,5,block.AIR.id)
+mc.setBlock(16,3,3,block.AIR.id)
+bounds=(0,0,0,17,6,6)
+
+#local arrays, diagonal cells only join with connectivity 26
+mask=np.zeros((3,3,3),dtype=bool)
+mask[0,0,0]=mask[1,1,1]=mask[1,1,2]=True
+assert connected(mask,[(1,1,1)]).sum()==2
+assert connected(mask,[(1,1,1)],connectivity=26).sum()==3
+assert connected(mask,[(2,2,2)]).sum()==0
+labels,count=label(mask)
+assert count==2 and labels[1,1,1]==labels[1,1,2]!=labels[0,0,0]
+assert label(mask,connectivity=26)[1]==1
+print("connected ok")
+
+#the closed room is filled and the wall stops the fill
+floodFill(mc,(3.7,3.2,3.9),bounds,block.WATER_STATIONARY.id,closed=True)
+assert world.getBlock(1,1,1)==(block.WATER_STATIONARY.id,0) and world.getBlock(5,5,5)==(block.WATER_STATIONARY.id,0)
+assert world.getBlock(0,3,3)==(block.GLASS.id,0) and world.getBlock(8,3,3)==(block.AIR.id,0)
+#float positions are floored, -0.5 is the cell -1 outside the bounds
+try:
+    floodFill(mc,(-0.5,3,3),bounds,block.STONE.id)
+    assert False
+except ValueError:
+    pass
+print("floodFill ok")
+
+#the room with the hole reaches the edge of the bounds, nothing is sent
+try:
+    floodFill(mc,(13,3,3),bounds,block.STONE.id,closed=True)
+    assert False
+except FillLimitError:
+    pass
+assert world.getBlock(13,3,3)==(block.AIR.id,0)
+#more cells than the limit, nothing is sent either
+try:
+    floodFill(mc,(13,3,3),bounds,block.STONE.id,limit=50)
+    assert False
+except FillLimitError:
+    pass
+assert world.getBlock(13,3,3)==(block.AIR.id,0)
+print("limits ok")
+
+#replace the water that is connected to a cell, the other ids stay
+replaceConnected(mc,(1,1,1),bounds,[block.WATER_STATIONARY.id],block.AIR.id)
+assert world.getBlock(3,3,3)==(block.AIR.id,0) and world.getBlock(0,0,0)==(block.GLASS.id,0)
+print("replaceConnected ok")
+
+#the two glass structures, and a single block dropped by minSize
+mc.setBlock(8,6,6,block.GLASS.id)
+lo,labels,sizes=components(mc,bounds,[block.GLASS.id])
+assert len(sizes)==3
+lo,labels,sizes=components(mc,bounds,[block.GLASS.id],minSize=2)
+assert sizes==[7*7*7-5*5*5,7*7*7-5*5*5-1] and labels[8,6,6]==0
+assert labels[0,0,0]==1 and labels[10,0,0]==2
+print("components ok")
@@ -0,0 +1,33 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.image import imageBoxes, drawImage, WOOL_PALETTE
+from mcpi_e import block
+
+world=MemoryWorld()
+mc=world.connect()
+
+#a 16x8 picture, left half white, right half red, with a transparent corner
+pixels=np.zeros((8,16,4),dtype=np.uint8)
+pixels[:,:8]=(234,236,237,255)
+pixels[:,8:]=(160,39,34,255)
+pixels[0,0,3]=0
+
+#nearest colours, exact palette colours map to themselves
+index=WOOL_PALETTE.match(pixels)
+assert (index[:,:8]==0).all() and (index[:,8:]==14).all()
+
+#upright in the xy plane, bottom row at y
+count=drawImage(mc,pixels,0,10,0)
+assert count==len(imageBoxes(pixels,span=100))
+assert count<16
+ids,data=world.getBlocks(0,10,0,15,17,0)
+assert (ids[:,:,0]==block.WOOL.id).sum()==8*16-1
+assert ids[0,7,0]==block.AIR.id    #the top left pixel is transparent
+assert data[0,0,0]==0 and data[15,0,0]==14
+print("drawImage ok")
+
+#flat in the xz plane
+drawImage(mc,pixels[...,:3],0,30,0,plane="xz")
+ids,data=world.getBlocks(0,30,0,15,30,7)
+assert (ids==block.WOOL.id).all() and data[15,0,0]==14
+print("plane xz ok")
@@ -0,0 +1,116 @@
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.minecraft import Minecraft
+from mcpi_e.connection import RequestError
+from mcpi_e.settings import Settings
+from mcpi_e.vec3 import Vec3
+from mcpi_e import block
+from mcpi_e import entity
+
+#runs without a server, the whole world lives in this process
+world=MemoryWorld()
+mc=world.connect("stoneskin")
+
+#blocks
+mc.setBlock(0,10,0,block.STONE.id)
+mc.setBlocks(1,10,0,4,12,3,block.WOOL.id,5)
+assert mc.getBlock(0,10,0)==block.STONE.id
+assert mc.getBlockWithData(2,11,1)==block.WOOL.withData(5)
+assert list(mc.getBlocks(0,10,0,1,10,0))==[block.STONE.id,block.WOOL.id]
+assert mc.getHeight(2,2)==12
+print("blocks ok")
+
+#player and entities
+mc.player.setTilePos(5,20,5)
+assert mc.player.getTilePos()==Vec3(5,20,5)
+mc.player.setRotation(90)
+mc.player.setPitch(0)
+assert mc.player.getRotation()==90 and mc.player.getPitch()==0
+d=mc.player.getDirection()
+assert round(d.x)==-1 and round(d.y)==0 and round(d.z)==0
+mc.player.setDirection(0,-1,0)
+assert mc.player.getPitch()==90
+mc.cmdplayer.getDirection()
+mc.player.setting("autojump",False)
+
+pig=mc.spawnEntity(6,20,5,entity.PIG.id)
+far=mc.spawnEntity(60,20,5,entity.PIG.id)
+assert [e[0] for e in mc.player.getEntities(5)]==[pig]
+assert [e[0] for e in mc.entity.getEntities(mc.playerId,5)]==[pig]
+assert mc.cmdplayer.removeEntities(5)==1
+assert mc.entity.removeEntities(mc.playerId,100,entity.PIG.id)==1
+assert mc.entity.getName(mc.playerId)=="stoneskin"
+print("player ok")
+
+#events, the clear commands have no reply and must not leave a line behind
+mc.player.clearEvents()
+mc.entity.clearEvents(mc.playerId)
+mc.cmdplayer.clearEvents()
+mc.events.clearAll()
+assert mc.player.pollBlockHits()==[] and mc.entity.pollChatPosts(mc.playerId)==[]
+assert mc.cmdplayer.pollProjectileHits()==[] and mc.events.pollBlockHits()==[]
+assert not mc.conn.transport.ready()
+try:
+    mc.conn.sendReceive(b"world.getBlock","x",0,0)
+    assert False
+except RequestError:
+    pass
+mc.conn.send(b"world.noSuchCommand")
+assert not mc.conn.transport.ready()
+print("events ok")
+
+#scan, copy and move
+tiles=list(mc.scanRegion(0,10,0,4,12,3,tileSize=2))
+assert sum(ids.size for origin,ids in tiles)==5*3*4
+mc.copyRegion(0,10,0,4,12,3,20,10,0)
+assert mc.getBlock(20,10,0)==block.STONE.id and mc.getBlock(24,12,3)==block.WOOL.id
+mc.moveRegion(20,10,0,24,12,3,22,10,0)
+assert mc.getBlock(20,10,0)==block.AIR.id and mc.getBlock(22,10,0)==block.STONE.id
+print("regions ok")
+
+#write combining, a reply means every write before it was applied
+combined=MemoryWorld()
+mc2=combined.connect("stoneskin",Settings(SYS_SPEED=0,SHOW_DEBUG=False,SHOW_Log=False,COMBINE_WRITES=4096))
+for x in range(30):
+    mc2.setBlock(x,5,0,block.GOLD_BLOCK.id)
+assert combined.getBlock(29,5,0)==(0,0)
+mc2.getHeight(100,100)
+assert combined.getBlock(29,5,0)==(block.GOLD_BLOCK.id,0)
+assert mc2.conn.combiner.commands==1
+#commands that are not held go out after the writes made before them
+mc2.setBlocks(0,4,0,2,4,2,block.GLASS.id)
+mc2.player.setTilePos(1,5,1)
+assert combined.getBlock(1,4,1)==(block.GLASS.id,0)
+mc2.conn.close()
+print("combine ok")
+
+#batched spawns, a failed spawn gives a RequestError in its place
+ids=mc.spawnEntities([(x,20,0) for x in range(10)],entity.COW.id)
+assert len(set(ids))==10
+assert mc.removeEntitiesById(ids[:5])==[1]*5
+bad=mc.spawnEntities([(0,20,0),(1,20,0)],[entity.COW.id,-5])
+assert isinstance(bad[0],int) and isinstance(bad[1],RequestError)
+print("spawnEntities ok")
+
+#offline worlds can be sent to another world later
+copy=MemoryWorld()
+world.writeTo(copy.connect())
+assert copy.getBlock(22,10,0)==world.getBlock(22,10,0)
+print("writeTo ok")
+
+#a recorded session replays into another world, spawned entities get their new ids
+recorded=MemoryWorld(record=True)
+mc3=recorded.connect("stoneskin")
+mc3.setBlock(0,0,0,70000)
+assert mc3.getBlock(0,0,0)==block.AIR.id
+mc3.setBlock(1,1,1,block.STONE.id)
+pig=mc3.spawnEntity(1,2,3,entity.PIG.id)
+cow=mc3.spawnEntity(4,5,6,entity.COW.id)
+mc3.entity.setPos(cow,9,9,9)
+mc3.removeEntity(pig)
+target=MemoryWorld()
+target.nextId=100
+recorded.replay(target.connect("stoneskin").conn)
+assert target.getBlock(1,1,1)==(block.STONE.id,0)
+assert list(target.entities.values())==[entity.COW.id]
+assert [target.positions[i] for i in target.entities]==[[9.0,9.0,9.0]]
+print("replay ok")
@@ -0,0 +1,74 @@
+import os
+import tempfile
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.metacache import MetaCache
+from mcpi_e.settings import Settings
+from mcpi_e import entity
+
+#a clock the test moves by hand
+now=[1000.0]
+MetaCache.clock=staticmethod(lambda: now[0])
+
+world=MemoryWorld()
+mc=world.connect("stoneskin",Settings(SYS_SPEED=0,SHOW_DEBUG=False,SHOW_Log=False,META_TTL=60))
+meta=mc.meta
+me=mc.playerId
+
+#within the ttl the cached ids are returned, even if the server changed
+assert mc.getPlayerEntityId("stoneskin")==me
+assert mc.getPlayerEntityIds()==[me]
+world.players["steve"]=world._newId()
+assert mc.getPlayerEntityIds()==[me]
+assert meta.hits>=2
+now[0]+=61
+assert sorted(mc.getPlayerEntityIds())==sorted([me,world.players["steve"]])
+#invalidate forgets at once
+world.players["alex"]=world._newId()
+meta.invalidate("players")
+assert len(mc.getPlayerEntityIds())==3
+print("players ok")
+
+#names both ways, learning an id answers getName
+assert meta.name(me)=="stoneskin"
+assert meta.playerId("steve")==world.players["steve"]
+misses=meta.misses
+assert mc.entity.getName(world.players["steve"])=="steve"
+assert meta.misses==misses
+meta.invalidate("steve")
+assert world.players["steve"] not in meta.names
+print("names ok")
+
+#entity types are the module constants
+types=mc.getEntityTypes()
+pig=meta.entityType(entity.PIG.id)
+assert pig is entity.PIG and meta.entityType(pig.name) is pig
+assert mc.getEntityTypes()[0] is types[0]
+try:
+    meta.entityType(-1)
+    assert False
+except ValueError:
+    pass
+print("types ok")
+
+#saved values keep their age and expire as if the script kept running
+meta.invalidate("stoneskin")
+meta.playerId("stoneskin")
+path=os.path.join(tempfile.mkdtemp(),"meta.json")
+meta.save(path)
+other=MetaCache(mc.conn,ttl=60)
+assert other.load(path)
+assert other.playerId("stoneskin")==me and other.hits==1
+assert [e.id for e in other.entityTypes()]==[e.id for e in types]
+now[0]+=61
+other.playerId("stoneskin")
+assert other.misses==1
+assert not MetaCache(mc.conn).load(path+".missing")
+print("save ok")
+
+#preload fills the cache without asking
+fresh=MetaCache(mc.conn,ttl=60)
+fresh.preload({"herobrine":999},[entity.COW,(9999,"Custom")])
+assert fresh.playerId("herobrine")==999 and fresh.name(999)=="herobrine"
+assert fresh.entityType("Custom").id==9999
+assert fresh.misses==0
+print("preload ok")
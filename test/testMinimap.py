@@ -0,0 +1,51 @@
+import os
+import tempfile
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.minimap import Minimap, VOID
+from mcpi_e import block
+
+world=MemoryWorld()
+mc=world.connect()
+mc.setBlocks(0,0,0,31,10,31,block.STONE.id)
+mc.setBlocks(0,11,0,15,11,31,block.GRASS.id)
+mc.setBlock(20,30,20,block.GOLD_BLOCK.id)
+
+#the first update reads every tile, from the top slab down to the ground
+m=Minimap(mc,0,0,31,31,y0=0,y1=40,tileSize=16,slab=8)
+changed=m.update()
+assert sorted(changed)==[(0,0),(0,16),(16,0),(16,16)]
+assert m.tops[5,5]==block.GRASS.id and m.heights[5,5]==11
+assert m.tops[25,5]==block.STONE.id and m.heights[25,5]==10
+assert m.tops[20,20]==block.GOLD_BLOCK.id and m.heights[20,20]==30
+#the gold block stops the slabs for its column only, the rest of the tile goes on
+assert m.reads>4
+assert m.image.shape==(32,32,3)
+print("first update ok")
+
+#nothing dirty, nothing read
+reads=m.reads
+assert m.update()==[] and m.reads==reads
+#a dirty tile is read again, and only drawn when it changed
+m.markDirty(3,3)
+assert m.update()==[] and m.reads>reads
+mc.setBlock(3,12,3,block.GLASS.id)
+m.markDirty(3,3)
+assert m.update()==[(0,0)]
+assert m.tops[3,3]==block.GLASS.id and m.heights[3,3]==12
+assert (m.pixels[3,3]>0).all()
+#an area covers every tile it touches, clipped to the map
+m.markDirty(-100,10,17,20)
+assert m.dirty=={(0,0),(0,16),(16,0),(16,16)}
+print("incremental update ok")
+
+#empty columns are black, the PPM has the map size
+empty=Minimap(mc,100,100,109,104,y0=0,y1=20,tileSize=8)
+empty.update()
+assert (empty.pixels==VOID).all() and empty.image.shape==(5,10,3)
+path=os.path.join(tempfile.mkdtemp(),"map.ppm")
+m.save(path)
+with open(path,"rb") as f:
+    assert f.readline()==b"P6 32 32 255\n"
+    assert f.read(3)==m.image[0,0].tobytes()
+assert os.path.getsize(path)==13+32*32*3
+print("save ok")
@@ -0,0 +1,37 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.pathfind import Pathfinder
+from mcpi_e.vec3 import Vec3
+from mcpi_e import block
+
+world=MemoryWorld()
+mc=world.connect()
+#a floor at y=9 with a wall at x=-5 that has one gap, and a step up at x>=3
+world.setBlocks(-20,9,-20,9,9,9,block.STONE.id)
+world.setBlocks(-5,10,-20,-5,12,9,block.STONE.id)
+world.setBlocks(-5,10,6,-5,12,6,block.AIR.id)
+world.setBlocks(3,10,-20,9,10,9,block.STONE.id)
+world.setBlocks(-12,9,-12,-8,9,-8,block.WATER_STATIONARY.id)
+
+finder=Pathfinder.scan(mc,-20,8,-20,9,14,9)
+assert finder.walkable(0,10,0) and not finder.walkable(0,11,0)
+assert not finder.walkable(-10,10,-10)    #water is no floor
+
+#around the wall through the gap, one block per step
+path=finder.findPath(Vec3(-15,10,0),Vec3(0,10,0))
+assert path[0]==Vec3(-15,10,0) and path[-1]==Vec3(0,10,0)
+assert Vec3(-5,10,6) in path
+assert all(abs(a.x-b.x)+abs(a.z-b.z)==1 for a,b in zip(path,path[1:]))
+#and up the step
+path=finder.findPath(Vec3(0,10,0),Vec3(5,11,0))
+assert path==[Vec3(x,10 if x<3 else 11,0) for x in range(6)]
+
+#float positions below zero are floored, like getPos positions
+assert finder.findPath((-14.5,10.0,-0.5),(-14.0,10,-1))==[Vec3(-15,10,-1),Vec3(-14,10,-1)]
+
+#no way up three blocks, and nothing outside the scan
+world.setBlocks(-20,10,-20,9,12,-15,block.STONE.id)
+closed=Pathfinder.scan(mc,-20,8,-20,9,14,9)
+assert closed.findPath(Vec3(0,10,0),Vec3(0,13,-18)) is None
+assert finder.findPath(Vec3(0,10,0),Vec3(50,10,0)) is None
+print("findPath ok")
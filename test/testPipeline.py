@@ -0,0 +1,26 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.pipeline import buildSections
+from mcpi_e import block
+
+#the generator runs in other processes, it has to be a module level function
+def tower(section):
+    x,z=section
+    ids=np.full((8,20,8),-1,dtype=np.int32)
+    ids[2:6,:x+z+1,2:6]=block.STONE.id
+    ids[2:6,x+z+1,2:6]=block.GOLD_BLOCK.id
+    return (x*8,0,z*8),ids
+
+if __name__=="__main__":
+    world=MemoryWorld()
+    mc=world.connect()
+    mc.setBlock(0,0,0,block.DIRT.id)
+    sections=[(x,z) for x in range(4) for z in range(3)]
+    count=buildSections(mc,tower,sections,processes=2,maxPending=3)
+    assert count==2*len(sections)
+    for x,z in sections:
+        assert world.getHeight(x*8+3,z*8+3)==x+z+1
+        assert world.getBlock(x*8+3,x+z+1,z*8+3)==(block.GOLD_BLOCK.id,0)
+    #cells set to skip are left alone
+    assert world.getBlock(0,0,0)==(block.DIRT.id,0)
+    print("buildSections ok")
@@ -0,0 +1,35 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.scan import tiles, scanRegion, readRegion, readData
+from mcpi_e.vec3 import Vec3
+from mcpi_e import block
+
+world=MemoryWorld()
+mc=world.connect()
+ids=np.random.RandomState(1).randint(1,5,size=(40,20,30))
+world.setBlocks(-10,0,-5,29,19,24,ids)
+
+#tiles come in x, z, y order and cover the region exactly once
+boxes=tiles(-10,0,-5,29,19,24,16)
+assert boxes[0][0]==Vec3(-10,0,-5) and boxes[1][0]==Vec3(6,0,-5)
+assert sum(np.prod(shape) for origin,shape in boxes)==40*20*30
+
+#with read-ahead the tiles still come back in order, each with its own blocks
+seen=[]
+for origin,part in scanRegion(mc,-10,0,-5,29,19,24,tileSize=16,readAhead=3):
+    seen.append(origin)
+    x,y,z=origin.x+10,origin.y,origin.z+5
+    assert (part==ids[x:x+part.shape[0],y:y+part.shape[1],z:z+part.shape[2]]).all()
+assert seen==[origin for origin,shape in boxes]
+print("scanRegion ok")
+
+#tiles that do not divide the region are cut at its edge
+lo,whole=readRegion(mc,-10,0,-5,29,19,24,tileSize=7)
+assert lo==Vec3(-10,0,-5) and (whole==ids).all()
+print("readRegion ok")
+
+#data values of the blocks that need them
+world.setBlocks(0,30,0,3,30,0,block.WOOL.id,5)
+lo,part=readRegion(mc,0,30,0,3,30,0)
+assert (readData(mc,lo,part)==5).all()
+print("readData ok")
@@ -0,0 +1,34 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.search import findBlocks, countBlocks, findInRegion, matchTemplate, toVec3, WILDCARD
+from mcpi_e.vec3 import Vec3
+from mcpi_e import block
+
+world=MemoryWorld()
+mc=world.connect()
+world.setBlocks(-20,0,-20,19,4,19,block.STONE.id)
+for x,y,z in ((-15,2,3),(0,0,0),(7,4,-19)):
+    mc.setBlock(x,y,z,block.DIAMOND_ORE.id)
+mc.setBlock(5,1,5,block.GOLD_ORE.id)
+
+#positions in world coordinates, from a scan tile by tile
+found=findInRegion(mc,[block.DIAMOND_ORE],-20,0,-20,19,4,19,tileSize=16)
+assert sorted(map(tuple,toVec3(found)))==sorted([(-15,2,3),(0,0,0),(7,4,-19)])
+region=world.getBlocks(-20,0,-20,19,4,19)[0]
+assert countBlocks(region,[block.DIAMOND_ORE,block.GOLD_ORE])=={block.DIAMOND_ORE.id:3,block.GOLD_ORE.id:1}
+assert findBlocks(region,block.GOLD_ORE.id,(-20,0,-20)).tolist()==[[5,1,5]]
+print("findBlocks ok")
+
+#a small structure, found by both methods, with a wildcard cell
+ids=np.zeros((30,10,30),dtype=int)
+template=np.full((3,3,3),block.COBBLESTONE.id)
+template[1,1,1]=WILDCARD
+for corner in ((2,1,4),(20,5,25)):
+    x,y,z=corner
+    ids[x:x+3,y:y+3,z:z+3]=template
+    ids[x+1,y+1,z+1]=block.TORCH.id
+for method in ("shift","fft"):
+    hits=matchTemplate(ids,template,(100,0,100),method=method)
+    assert hits.tolist()==[[102,1,104],[120,5,125]],method
+assert len(matchTemplate(ids,np.ones((40,1,1))))==0
+print("matchTemplate ok")
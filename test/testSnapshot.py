@@ -0,0 +1,64 @@
+import os
+import tempfile
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.snapshot import Snapshot, SnapshotError, saveRegion
+from mcpi_e.vec3 import Vec3
+from mcpi_e import block
+
+folder=tempfile.mkdtemp()
+path=os.path.join(folder,"test.snap")
+
+world=MemoryWorld()
+mc=world.connect()
+ids=np.random.RandomState(2).randint(0,4,size=(50,10,40))
+world.setBlocks(0,0,0,49,9,39,ids)
+world.setBlocks(0,10,0,49,10,39,block.WOOL.id,3)
+
+#scan to disk and read it back
+assert saveRegion(mc,path,0,0,0,49,10,39,tileSize=16)==4*1*3
+snap=Snapshot(path)
+assert snap.bounds()==(Vec3(0,0,0),Vec3(49,10,39))
+part,data=snap.region(0,0,0,49,9,39)
+assert (part==ids).all()
+one,_=snap.chunk(16,0,16)
+assert (one==np.concatenate([ids,np.full((50,1,40),block.WOOL.id)],axis=1)[16:32,:,16:32]).all()
+snap.close()
+print("round trip ok")
+
+#chunks are added while the file grows past its first index block
+with Snapshot(path,"w",entriesPerBlock=2) as snap:
+    for i in range(5):
+        snap.add((i*4,0,0),np.full((4,3,2),i+1),np.full((4,3,2),i))
+with Snapshot(path,"a") as snap:
+    snap.add((20,0,0),np.full((4,3,2),9))
+with Snapshot(path) as snap:
+    assert len(snap.origins())==6
+    part,data=snap.region(0,0,0,23,2,1)
+    assert (part[8:12]==3).all() and (data[8:12]==2).all() and (part[20:]==9).all()
+    #cells no chunk covers are missing
+    part,_=snap.region(0,0,0,23,2,5)
+    assert (part[:,:,2:]==-1).all()
+print("append ok")
+
+#a damaged chunk is reported, not returned
+with Snapshot(path) as snap:
+    offset,length=snap.chunks[(0,0,0)][3:5]
+with open(path,"r+b") as f:
+    f.seek(offset+length//2)
+    f.write(b"\xff\xff\xff\xff")
+with Snapshot(path) as snap:
+    try:
+        snap.chunk(0,0,0)
+        assert False
+    except SnapshotError:
+        pass
+    assert (snap.chunk(4,0,0)[0]==2).all()
+with open(path,"r+b") as f:
+    f.write(b"NOTASNAP")
+try:
+    Snapshot(path)
+    assert False
+except SnapshotError:
+    pass
+print("damage ok")
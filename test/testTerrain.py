@@ -0,0 +1,32 @@
+import numpy as np
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.terrain import Terrain, noise
+from mcpi_e import block
+
+#noise only depends on the seed and the coordinates
+x=np.arange(-50,50).reshape(-1,1)
+z=np.arange(0,30).reshape(1,-1)
+n=noise(x,z,seed=3)
+assert n.shape==(100,30) and (abs(n)<=1).all()
+assert (noise(x,z,seed=3)==n).all() and not (noise(x,z,seed=4)==n).all()
+print("noise ok")
+
+#tiles fit together
+t=Terrain(seed=7,base=20,amplitude=8,waterLevel=18)
+whole=t.heights(0,0,40,40)
+assert (t.heights(20,10,20,30)==whole[20:,10:]).all()
+print("heights ok")
+
+#building puts grass or sand on top of every column and water up to the water level
+world=MemoryWorld()
+mc=world.connect()
+count=t.build(mc,0,0,39,39,tileSize=16)
+assert count>0
+ids,data=world.getBlocks(0,0,0,39,40,39)
+for cx,cz in ((0,0),(13,27),(39,39),(20,5)):
+    h=whole[cx,cz]
+    assert ids[cx,h,cz] in (block.GRASS.id,block.SAND.id)
+    assert ids[cx,0,cz]==block.STONE.id
+    assert ids[cx,h+1:19,cz].tolist()==[block.WATER_STATIONARY.id]*len(range(h+1,19))
+    assert ids[cx,max(h+1,19):,cz].tolist()==[block.AIR.id]*(41-max(h+1,19))
+print("build ok")
@@ -0,0 +1,40 @@
+import json
+import os
+import tempfile
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.settings import Settings
+from mcpi_e.trace import Tracer
+from mcpi_e import block
+
+world=MemoryWorld()
+mc=world.connect("stoneskin",Settings(SYS_SPEED=0.001,SHOW_DEBUG=False,SHOW_Log=False))
+tracer=Tracer(maxSpans=50).attach(mc)
+
+#every command is split into its steps, replies add a receive span
+with tracer.span("walls"):
+    mc.setBlocks(0,0,0,9,5,0,block.STONE.id)
+    mc.setBlock(0,6,0,block.GLASS.id)
+assert mc.getBlock(0,6,0)==block.GLASS.id
+totals=tracer.summary()
+assert totals["encode"][1]==3 and totals["write"][1]==3 and totals["receive"][1]==1
+assert totals["throttle"][1]==3 and totals["throttle"][0]>=0.003
+assert totals["walls"][1]==1
+
+#the newest maxSpans spans are kept
+for x in range(100):
+    mc.setBlock(x,10,0,block.STONE.id)
+assert len(tracer.spans)==50
+
+#chrome trace event json
+path=os.path.join(tempfile.mkdtemp(),"trace.json")
+tracer.save(path)
+with open(path) as f:
+    events=json.load(f)["traceEvents"]
+assert len(events)==50 and all(e["ph"]=="X" and e["dur"]>=0 for e in events)
+
+#nothing is recorded once detached
+tracer.clear()
+tracer.detach(mc)
+mc.setBlock(0,20,0,block.STONE.id)
+assert len(tracer.spans)==0
+print("tracer ok")
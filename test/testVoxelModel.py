@@ -0,0 +1,34 @@
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.voxelmodel import VoxelModel
+from mcpi_e import block
+
+#csg on a hollow box
+hall=VoxelModel().fill(0,0,0,39,20,39,block.STONE.id)
+hall=hall-VoxelModel().fill(1,1,1,38,19,38,block.STONE.id)
+assert hall.get(0,0,0)==(block.STONE.id,0) and hall.get(5,5,5) is None
+assert len(hall)==40*21*40-38*19*38
+print("csg ok")
+
+#models made from another one keep their blocks when the source changes
+a=VoxelModel().fill(0,0,0,20,20,20,block.STONE.id)
+a.set(3,3,3,block.DIRT.id)
+c=VoxelModel().fill(0,0,0,40,40,40,block.GLASS.id)
+for name,make in (("copy",lambda: a.copy()),("union",lambda: a|VoxelModel()),
+                  ("intersection",lambda: a&c),("translate",lambda: a.translate(16,0,0))):
+    b=make()
+    before=b.toArray()[1].copy()
+    a.set(5,5,5,block.GOLD_BLOCK.id)
+    a.set(3,3,3,block.WOOL.id)
+    assert (b.toArray()[1]==before).all(),name
+    #and the other way round
+    b.set(6,6,6,block.DIAMOND_BLOCK.id)
+    assert a.get(6,6,6)==(block.STONE.id,0),name
+print("shared bricks ok")
+
+#placing sends the same blocks as the model holds
+world=MemoryWorld()
+mc=world.connect()
+hall.place(mc,100,10,100)
+ids,data=world.getBlocks(100,10,100,139,30,139)
+assert (ids==hall.toArray(skip=0)[1][:40,:21,:40]).all()
+print("place ok")
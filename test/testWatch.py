@@ -0,0 +1,49 @@
+from mcpi_e.memoryworld import MemoryWorld
+from mcpi_e.watch import RegionWatcher
+from mcpi_e.vec3 import Vec3
+from mcpi_e import block
+
+#a clock the test moves by hand
+now=[0.0]
+RegionWatcher.clock=staticmethod(lambda: now[0])
+
+world=MemoryWorld()
+mc=world.connect()
+mc.setBlocks(0,0,0,31,3,31,block.STONE.id)
+
+#4 tiles of 16x8x16, the first read only remembers them
+w=RegionWatcher(mc,0,0,0,31,7,31,tileSize=16,budget=100,minInterval=1,maxInterval=8)
+assert len(w.tiles)==4
+assert w.scanAll()==[] and w.reads==4
+print("first scan ok")
+
+#a change is reported with the old and the new block
+mc.setBlock(20,3,5,block.GOLD_BLOCK.id)
+mc.setBlock(2,6,30,block.GLASS.id)
+events=sorted(w.scanAll(),key=lambda e: e.pos.x)
+assert [(e.pos,e.old,e.new) for e in events]==[(Vec3(2,6,30),block.AIR.id,block.GLASS.id),
+                                               (Vec3(20,3,5),block.STONE.id,block.GOLD_BLOCK.id)]
+assert w.scanAll()==[]
+print("change events ok")
+
+#poll only reads the tiles that are due, quiet tiles wait longer and longer
+reads=w.reads
+assert w.poll()==[] and w.reads==reads
+now[0]+=1.5
+mc.setBlock(20,3,5,block.DIAMOND_BLOCK.id)
+events=w.poll()
+assert [(e.pos,e.new) for e in events]==[(Vec3(20,3,5),block.DIAMOND_BLOCK.id)]
+changed=[t for t in w.tiles if t.origin.x==16 and t.origin.z==0][0]
+quiet=[t for t in w.tiles if t.origin.x==0 and t.origin.z==0][0]
+assert changed.interval<quiet.interval<=w.maxInterval
+print("poll ok")
+
+#the budget limits the reads per poll, the most overdue tiles go first
+slow=RegionWatcher(mc,0,0,0,31,7,31,tileSize=16,budget=2)
+assert len(slow.scanAll())==0
+now[0]+=100
+slow.tokens=0
+slow.last=now[0]-1
+slow.poll()
+assert slow.reads==4+2
+print("budget ok")